@@ -0,0 +1,172 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+
+import pygame
+
+BUNDLE_MAGIC = b'NVAB'
+BUNDLE_VERSION = 1
+HEADER = struct.Struct('<4sHHIII')  # magic, version, flags, width, height, frame count
+
+FLAG_ALPHA = 1  # Frames carry per-pixel alpha
+FLAG_BGRA = 2  # Pixels are stored in the display's B, G, R, A byte order
+
+class AssetBundle:
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hashes = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.clean()
+
+    def clean(self):
+
+        # Drops writes an earlier launch never finished, then trims the cache to its cap
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith('.tmp'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        self.evict()
+
+    def evict(self, keep=None):
+
+        # Least recently used entries go first: loads refresh an entry's modification time, so entries for
+        # window sizes or source images no longer in use age out
+        entries = []
+        try:
+            for name in os.listdir(self.directory):
+                if name.endswith('.bin'):
+                    path = os.path.join(self.directory, name)
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass  # Already gone, or still mapped where that blocks removal (Windows)
+
+    def source_hash(self, source_path):
+
+        with self.lock:
+            digest = self.hashes.get(source_path)
+        if digest is None:
+            with open(source_path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()[:16]
+            with self.lock:
+                self.hashes[source_path] = digest
+        return digest
+
+    def entry_path(self, variant, source_path, size):
+
+        size_tag = f"{size[0]}x{size[1]}" if size else "native"
+        return os.path.join(self.directory, f"{variant}-{self.source_hash(source_path)}-{size_tag}.bin")
+
+    def load(self, variant, source_path, size=None):
+
+        try:
+            path = self.entry_path(variant, source_path, size)
+            with open(path, 'rb') as f:
+                # Private mapping: pages are read lazily and never written back
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # A truncated, foreign or outdated file is a miss, and is deleted so it gets written again
+        valid = len(data) >= HEADER.size
+        if valid:
+            magic, version, flags, width, height, count = HEADER.unpack_from(data, 0)
+            offset = HEADER.size + 4 * count
+            frame_bytes = width * height * 4
+            valid = (magic == BUNDLE_MAGIC and version == BUNDLE_VERSION and width and height and count
+                     and len(data) >= offset + frame_bytes * count)
+        if not valid:
+            data.close()
+            self.misses += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        # Marks the entry as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        durations = list(struct.unpack_from(f'<{count}I', data, HEADER.size))
+        pixel_format = 'BGRA' if flags & FLAG_BGRA else 'RGBA'
+        view = memoryview(data)
+        frames = []
+        for index in range(count):
+            start = offset + index * frame_bytes
+            frame = pygame.image.frombuffer(view[start:start + frame_bytes], (width, height), pixel_format)
+            if not flags & FLAG_ALPHA:
+                frame.set_alpha(None)
+            frames.append(frame)
+
+        self.hits += 1
+        return frames, durations
+
+    def store(self, variant, source_path, frames, durations, size=None):
+
+        # frames may also be a generator, written as it goes so a large animation is never held whole;
+        # then durations gives the count and the first frame decides the pixel format for all of them.
+        # A generator that stops short leaves no entry behind.
+        listed = frames if isinstance(frames, list) else None
+        frames = iter(frames)
+        first = next(frames, None)
+        if first is None:
+            return
+
+        width, height = first.get_size()
+        has_alpha = any(frame.get_flags() & pygame.SRCALPHA for frame in listed or [first])
+        flags = (FLAG_ALPHA if has_alpha else 0) | (FLAG_BGRA if display_is_bgra() else 0)
+        pixel_format = 'BGRA' if flags & FLAG_BGRA else 'RGBA'
+
+        path = self.entry_path(variant, source_path, size)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, flags, width, height, len(durations)))
+                f.write(struct.pack(f'<{len(durations)}I', *durations))
+                f.write(pygame.image.tobytes(first, pixel_format))
+                written = 1
+                for frame in frames:
+                    f.write(pygame.image.tobytes(frame, pixel_format))
+                    written += 1
+            if written == len(durations):
+                os.replace(temp_path, path)
+                self.evict(keep=path)
+        except OSError as e:
+            print(f"Failed to write asset bundle {path}: {e}")
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+def display_is_bgra():
+
+    surface = pygame.display.get_surface()
+    return surface is not None and surface.get_masks()[:3] == (0xFF0000, 0xFF00, 0xFF)
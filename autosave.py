@@ -0,0 +1,104 @@
+import os
+import struct
+import threading
+
+from replay import decode_moves, encode_moves
+from rules import RULES
+from state import PackedState
+
+SAVE_MAGIC = b'NVSV'
+SAVE_VERSION = 1
+HEADER = struct.Struct('<4sBBBQQI')  # magic, version, flags, state, packed race, seed, rules digest
+
+FLAG_SEEDED = 1
+
+# Only games in progress are saved; the dice roll animation resumes as the choice it was leading to
+SAVED_STATES = ("DICE_READY", "RESOURCE_CHOICE", "EVENT")
+
+class Snapshot:
+
+    def __init__(self, state, race_state, moves, seed=None, rules_digest=None):
+        self.state = state
+        self.race_state = race_state  # PackedState; its dice field holds the last roll
+        self.moves = list(moves)
+        self.seed = seed
+        self.rules_digest = RULES.digest if rules_digest is None else rules_digest
+
+    def encode(self):
+
+        flags = FLAG_SEEDED if self.seed is not None else 0
+        header = HEADER.pack(SAVE_MAGIC, SAVE_VERSION, flags, SAVED_STATES.index(self.state), self.race_state,
+                             self.seed or 0, self.rules_digest)
+        return header + encode_moves(self.moves)
+
+    @classmethod
+    def decode(cls, data):
+
+        if len(data) < HEADER.size:
+            raise ValueError("Snapshot is truncated")
+        magic, version, flags, state, race_state, seed, digest = HEADER.unpack_from(data, 0)
+        if magic != SAVE_MAGIC or version != SAVE_VERSION or state >= len(SAVED_STATES):
+            raise ValueError("Not a snapshot of this version")
+        return cls(SAVED_STATES[state], PackedState(race_state), decode_moves(data[HEADER.size:]),
+                   seed if flags & FLAG_SEEDED else None, digest)
+
+    @classmethod
+    def load(cls, path):
+
+        with open(path, 'rb') as f:
+            return cls.decode(f.read())
+
+class Autosaver:
+
+    # One writer thread; only the newest pending snapshot is written, so bursts of transitions coalesce
+    CLEAR = object()
+
+    def __init__(self, path):
+        self.path = path
+        self.pending = None
+        self.closing = False
+        self.writes = 0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name='autosave', daemon=True)
+        self.thread.start()
+
+    def save(self, data):
+
+        with self.condition:
+            self.pending = data
+            self.condition.notify()
+
+    def clear(self):
+
+        self.save(self.CLEAR)
+
+    def run(self):
+
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closing:
+                    self.condition.wait()
+                data, self.pending = self.pending, None
+                if data is None:
+                    return
+
+            try:
+                if data is self.CLEAR:
+                    if os.path.exists(self.path):
+                        os.remove(self.path)
+                else:
+                    temp_path = f"{self.path}.tmp"
+                    with open(temp_path, 'wb') as f:
+                        f.write(data)
+                    os.replace(temp_path, self.path)
+                self.writes += 1
+            except OSError as e:
+                print(f"Autosave to {self.path} failed: {e}")
+
+    def close(self, timeout=1.0):
+
+        # Flushes whatever is still pending, but never holds up exit for long
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        self.thread.join(timeout)
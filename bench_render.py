@@ -0,0 +1,206 @@
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+# Headless by default, and no replays, saves or logs written by the runs. Event animations too big for
+# memory play from the asset cache, so the runs get a throwaway one rather than the game's.
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('NVWA_WINDOWED', '1')  # resize() keeps the window's flags, and a fullscreen one keeps its mode
+os.environ.setdefault('NVWA_REPLAYS', '')
+if 'NVWA_ASSET_CACHE' not in os.environ:
+    os.environ['NVWA_ASSET_CACHE'] = tempfile.mkdtemp(prefix='nvwa-bench-')
+    atexit.register(shutil.rmtree, os.environ['NVWA_ASSET_CACHE'], ignore_errors=True)
+os.environ.setdefault('NVWA_AUTOSAVE', '')
+os.environ.setdefault('NVWA_EVENT_LOG', '')
+
+import pygame
+
+from main import Game, ticks_ms
+from replay import ScriptedRandom
+from rules import Engine
+from stats import percentile
+
+RESOLUTIONS = {
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '1440p': (2560, 1440),
+    '4k': (3840, 2160),
+}
+STATES = ('start', 'dice_ready', 'dice', 'resource_choice', 'event', 'game_over')
+MODES = ('full', 'steady')  # Whole scene redrawn every frame, or the normal dirty-rect path
+WARMUP_FRAMES = 10
+
+# Dice 4 into food, then Drought, repeated; keeps every run identical
+SCRIPT = [(4, 0, 0)] * 1000
+
+def enter_state(game, state):
+
+    game.reset_game()
+    game.engine = Engine(rng=ScriptedRandom(SCRIPT), events=game.random_events)
+    if state == 'start':
+        return
+
+    game.start_game()
+    if state == 'dice_ready':
+        return
+
+    game.state = "DICE"
+    game.start_dice_animation()
+    if state == 'dice':
+        return
+
+    while game.dice_animating:
+        game.update_dice_animation()
+    if state == 'resource_choice':
+        return
+
+    game.allocate_resource('food')
+    if state == 'event':
+        # Measure playback from the pre-scaled frames, not the one-off scaling thread
+        for job in list(game.event_scale_jobs.values()):
+            job.join()
+        return
+
+    game.race.population, game.race.food, game.race.tech = 9, 8, 5
+    game.end_game()
+
+def step(game, state):
+
+    # Per-frame work the main loop does outside draw()
+    if state == 'dice':
+        game.update_dice_animation()
+        if not game.dice_animating:
+            game.state = "DICE"
+            game.start_dice_animation()
+
+    elif state == 'event':
+        # Jump to the next GIF frame so every draw shows a new one, as playback does at its own pace
+        animation = game.event_animation()
+        if animation:
+            wait = animation.ms_until_next_frame(ticks_ms() - game.event_started_at)
+            if wait:
+                game.event_started_at -= wait
+
+def run_frames(game, state, mode, frames, timings=None):
+
+    for _ in range(frames):
+        step(game, state)
+        if mode == 'full':
+            game.request_full_redraw()
+        started = time.perf_counter()
+        game.draw()
+        if timings is not None:
+            timings.append((time.perf_counter() - started) * 1000)
+
+def measure(game, state, mode, frames):
+
+    enter_state(game, state)
+    run_frames(game, state, mode, WARMUP_FRAMES)
+
+    timings = []
+    run_frames(game, state, mode, frames, timings)
+    timings.sort()
+
+    # A separate pass, since tracing slows the frames down
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    run_frames(game, state, mode, frames)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'ms': {
+            'mean': sum(timings) / len(timings),
+            'p50': percentile(timings, 0.50),
+            'p90': percentile(timings, 0.90),
+            'p99': percentile(timings, 0.99),
+            'max': timings[-1],
+        },
+        'alloc_peak_kb': (peak - before) / 1024,
+        'alloc_retained_kb': (current - before) / 1024,
+    }
+
+def git_revision():
+
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(resolutions, states, frames):
+
+    game = Game()
+    results = []
+
+    # Background asset loads would otherwise land in the first measurements
+    for name in list(game.assets.futures):
+        game.assets.get(name)
+    for name in resolutions:
+        game.resize(*RESOLUTIONS[name])
+        for state in states:
+            for mode in MODES:
+                result = measure(game, state, mode, frames)
+                result.update(resolution=name, state=state, mode=mode)
+                results.append(result)
+                ms = result['ms']
+                print(f"{name:>6} {state:<16} {mode:<7} p50 {ms['p50']:7.3f}ms  p99 {ms['p99']:7.3f}ms  "
+                      f"peak {result['alloc_peak_kb']:8.1f}KB")
+    game.shutdown()
+
+    return {
+        'revision': git_revision(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'video_driver': os.environ['SDL_VIDEODRIVER'],
+        'frames': frames,
+        'results': results,
+    }
+
+def compare(baseline_path, report):
+
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    old = {(r['resolution'], r['state'], r['mode']): r for r in baseline['results']}
+
+    print(f"\nAgainst {baseline.get('revision') or baseline_path}:")
+    for result in report['results']:
+        previous = old.get((result['resolution'], result['state'], result['mode']))
+        if previous is None:
+            continue
+        deltas = []
+        for stat in ('p50', 'p99'):
+            before, after = previous['ms'][stat], result['ms'][stat]
+            deltas.append(f"{stat} {(after - before) / before:+7.1%}" if before else f"{stat}     n/a")
+        print(f"{result['resolution']:>6} {result['state']:<16} {result['mode']:<7} {'  '.join(deltas)}")
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Frame time and allocation benchmark for every game state")
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--resolutions', nargs='+', choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument('--states', nargs='+', choices=STATES, default=list(STATES))
+    parser.add_argument('--output', help="defaults to render_bench-<revision>.json")
+    parser.add_argument('--compare', help="earlier JSON report to diff against")
+    args = parser.parse_args()
+
+    report = run_suite(args.resolutions, args.states, args.frames)
+    output = args.output or f"render_bench-{report['revision'] or 'local'}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(args.compare, report)
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
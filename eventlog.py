@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+FIELDS = ('time', 'seed', 'round', 'event', 'population_change', 'population_before', 'population_after',
+          'food', 'defense', 'tech')
+CAPACITY = 4096  # Records kept in memory, across games
+BATCH_SIZE = 64  # Unwritten records that wake the writer before its interval is up
+FLUSH_INTERVAL = 2.0  # Seconds between writes otherwise
+MAX_FILE_BYTES = 1024 * 1024
+BACKUP_FILES = 5  # events.jsonl.1 is the newest rotated file
+
+class EventLog:
+
+    # Fixed-capacity ring of event records, one tuple per event in FIELDS order. The game thread only
+    # appends; a writer thread streams new records to rotating JSONL files in batches.
+    def __init__(self, path, capacity=CAPACITY, max_bytes=MAX_FILE_BYTES, backups=BACKUP_FILES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.records = deque(maxlen=capacity)
+        self.appended = 0
+        self.written = 0
+        self.dropped = 0  # Overwritten in the ring before the writer got to them
+        self.closing = False
+        self.condition = threading.Condition()
+        self.thread = None
+        if path:
+            self.thread = threading.Thread(target=self.run, name='event-log', daemon=True)
+            self.thread.start()
+
+    def record(self, seed, round_number, event, population_before, race):
+
+        record = (time.time(), seed, round_number, event.name, event.population_change, population_before,
+                  race.population, race.food, race.defense, race.tech)
+        with self.condition:
+            self.records.append(record)
+            self.appended += 1
+            if self.thread and self.appended - self.written >= BATCH_SIZE:
+                self.condition.notify()
+
+    def recent(self, count=None):
+
+        with self.condition:
+            records = list(self.records)
+        if count is not None:
+            records = records[-count:] if count else []
+        return [dict(zip(FIELDS, record)) for record in records]
+
+    def take_batch(self):
+
+        # Called with the condition held; returns the records appended since the last batch
+        pending = self.appended - self.written
+        available = min(pending, len(self.records))
+        self.dropped += pending - available
+        self.written = self.appended
+        return list(self.records)[len(self.records) - available:] if available else []
+
+    def run(self):
+
+        file = None
+        try:
+            while True:
+                with self.condition:
+                    if not self.closing and self.appended - self.written < BATCH_SIZE:
+                        self.condition.wait(FLUSH_INTERVAL)
+                    batch = self.take_batch()
+                    closing = self.closing
+                if batch:
+                    file = self.write(file, batch)
+                if closing:
+                    return
+        finally:
+            if file:
+                file.close()
+
+    def write(self, file, batch):
+
+        lines = ''.join(json.dumps(dict(zip(FIELDS, record))) + '\n' for record in batch)
+        try:
+            if file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                file = open(self.path, 'a', encoding='utf-8')
+            file.write(lines)
+            file.flush()
+            if file.tell() >= self.max_bytes:
+                file.close()
+                file = None
+                self.rotate()
+        except OSError as e:
+            print(f"Event log write to {self.path} failed: {e}")
+        return file
+
+    def rotate(self):
+
+        # events.jsonl -> events.jsonl.1 -> ... -> events.jsonl.<backups>; the oldest falls off the end
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def close(self, timeout=1.0):
+
+        # Writes out whatever is still buffered, but never holds up exit for long
+        if not self.thread:
+            return
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        self.thread.join(timeout)
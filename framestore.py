@@ -0,0 +1,153 @@
+import argparse
+import hashlib
+import os
+import threading
+import time
+import zlib
+
+import pygame
+
+from asset_bundle import display_is_bgra
+from surfacecache import SurfaceCache
+
+COMPRESS_LEVEL = 1  # Fast enough to pack frames while a GIF loads; event frames still shrink about 4x
+
+class FrameStore:
+
+    # Pixels of every animation frame. Identical frames are kept once, every frame is held zlib-compressed,
+    # and decoded surfaces stay resident within a byte budget, least recently used first out.
+    # Used from the asset loader and pre-scaling threads as well as the main thread.
+    def __init__(self, budget_bytes):
+        self.lock = threading.Lock()
+        self.packed = []  # Frame id -> (size, has alpha, pixel format, compressed pixels)
+        self.ids = {}  # (size, has alpha, pixel digest) -> frame id
+        self.resident = SurfaceCache(budget_bytes)  # Frame id -> decoded surface
+        self.animations = {}  # Animation key -> its frame ids, for the report
+        self.decodes = 0
+        self.duplicates = 0
+
+    def add(self, surface):
+
+        # Returns the frame's id; a frame identical to one already stored gets that frame's id
+        alpha = bool(surface.get_flags() & pygame.SRCALPHA)
+        pixel_format = 'BGRA' if display_is_bgra() else 'RGBA'
+        pixels = pygame.image.tobytes(surface, pixel_format)
+        key = (surface.get_size(), alpha, hashlib.blake2b(pixels, digest_size=16).digest())
+
+        with self.lock:
+            frame_id = self.ids.get(key)
+            if frame_id is not None:
+                self.duplicates += 1
+                return frame_id
+
+        data = zlib.compress(pixels, COMPRESS_LEVEL)
+        with self.lock:
+            frame_id = self.ids.get(key)
+            if frame_id is not None:
+                self.duplicates += 1
+                return frame_id
+            frame_id = len(self.packed)
+            self.packed.append((surface.get_size(), alpha, pixel_format, data))
+            self.ids[key] = frame_id
+        self.resident.put(frame_id, surface)
+        return frame_id
+
+    def register(self, key, frame_ids):
+
+        with self.lock:
+            self.animations[key] = frame_ids
+
+    def frame_size(self, frame_id):
+        return self.packed[frame_id][0]
+
+    def get(self, frame_id):
+
+        surface = self.resident.lookup(frame_id)
+        if surface is not None:
+            return surface
+        with self.lock:
+            size, alpha, pixel_format, data = self.packed[frame_id]
+
+        # Decompressed outside the lock; zlib releases the GIL, so other threads keep going
+        surface = pygame.image.frombuffer(zlib.decompress(data), size, pixel_format)
+        if not alpha:
+            # The buffer carries an unused alpha byte; a display format copy blits (and scales) as opaque
+            surface = surface.convert()
+
+        with self.lock:
+            self.decodes += 1
+        self.resident.put(frame_id, surface)
+        return surface
+
+    def report(self):
+
+        # Per animation; a frame shared between animations is counted in each of them
+        with self.resident.lock:
+            resident_sizes = {frame_id: size for frame_id, (_, size) in self.resident.entries.items()}
+        with self.lock:
+            rows = []
+            for key, frame_ids in self.animations.items():
+                unique = set(frame_ids)
+                resident = [resident_sizes[frame_id] for frame_id in unique if frame_id in resident_sizes]
+                rows.append({
+                    'animation': key,
+                    'frames': len(frame_ids),
+                    'unique_frames': len(unique),
+                    'resident_frames': len(resident),
+                    'resident_bytes': sum(resident),
+                    'packed_bytes': sum(len(self.packed[frame_id][3]) for frame_id in unique),
+                    'decoded_bytes': sum(self.packed[frame_id][0][0] * self.packed[frame_id][0][1] * 4
+                                         for frame_id in unique),
+                })
+        return rows
+
+    def print_report(self):
+
+        megabyte = 1024 * 1024
+        for row in self.report():
+            print(f"  {row['animation']:<14} {row['frames']:4} frames, {row['unique_frames']:4} unique, "
+                  f"{row['resident_frames']:4} resident {row['resident_bytes'] / megabyte:6.1f}MB, "
+                  f"packed {row['packed_bytes'] / megabyte:5.1f}MB of {row['decoded_bytes'] / megabyte:5.1f}MB")
+        print(f"  Resident {self.resident.used_bytes / megabyte:.1f}MB of {self.resident.max_bytes / megabyte:.0f}MB "
+              f"budget; {self.resident.hits} hits, {self.decodes} decodes, {self.duplicates} duplicate frames")
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Resident memory of the event animations in the frame store")
+    parser.add_argument('--budget-mb', type=int, help="defaults to NVWA_FRAME_BUDGET_MB")
+    args = parser.parse_args()
+
+    # Headless, and the GIFs are decoded rather than read back from the asset cache
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ['NVWA_ASSET_CACHE'] = ''
+    os.environ['NVWA_AUTOSAVE'] = ''
+    os.environ['NVWA_EVENT_LOG'] = ''
+    if args.budget_mb is not None:
+        os.environ['NVWA_FRAME_BUDGET_MB'] = str(args.budget_mb)
+    from main import Game
+
+    game = Game()
+    animations = [game.event_animation(event) for event in game.random_events]
+    store = game.frame_store
+    print("After loading:")
+    store.print_report()
+
+    # Plays each animation through once, as showing its event would
+    for animation in animations:
+        if animation.store is None:
+            continue
+        decodes = store.decodes
+        started = time.perf_counter()
+        for index in range(len(animation.frames)):
+            animation.frame(index)
+        elapsed = (time.perf_counter() - started) * 1000
+        decoded = store.decodes - decodes
+        per_frame = f", {elapsed / decoded:.2f}ms per decoded frame" if decoded else ""
+        print(f"Playing {animation.key}: {decoded} of {len(animation.frames)} frames decoded{per_frame}")
+    store.print_report()
+
+    game.shutdown()
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,32 @@
+from startup import STARTUP  # First, so every later import shows up in the startup trace
+
 import pygame
 import random
 import sys
 import os
-from PIL import Image, ImageSequence
-
-pygame.init()
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from itertools import accumulate, islice
+
+from asset_bundle import AssetBundle
+from autosave import SAVED_STATES, Autosaver, Snapshot
+from eventlog import EventLog
+from framestore import FrameStore
+from profiler import FrameProfiler
+from replay import Replay
+from rules import MAX_ROUNDS, RULES, Engine, determine_ending
+from state import PackedState
+from surfacecache import SurfaceCache
+from widgets import Button, Column, Label, Panel, WidgetTree
+
+# Only the subsystems the game uses; pygame.init() would also open audio and joysticks
+with STARTUP.span('init', 'pygame.display'):
+    pygame.display.init()
+with STARTUP.span('init', 'pygame.font'):
+    pygame.font.init()
 
 screen_info = pygame.display.Info()
 SCREEN_WIDTH = screen_info.current_w
@@ -13,8 +35,25 @@ SCREEN_HEIGHT = screen_info.current_h
 WINDOW_WIDTH = SCREEN_WIDTH
 WINDOW_HEIGHT = SCREEN_HEIGHT
 FPS = 60
-MAX_ROUNDS = 5
+IDLE_WAIT_MS = 1000  # Longest the loop sleeps on a static screen before waking up anyway
 DICE_ANIMATION_FRAMES = 30
+SURFACE_CACHE_BYTES = 160 * 1024 * 1024  # Upper bound for pre-scaled surfaces kept in memory
+EVENT_CACHE_BYTES = int(os.environ.get('NVWA_EVENT_CACHE_MB', 768)) * 1024 * 1024  # Full-screen event animations
+FRAME_STORE_BYTES = int(os.environ.get('NVWA_FRAME_BUDGET_MB', 64)) * 1024 * 1024  # Decoded GIF frames at their own size
+DEFAULT_GIF_FRAME_MS = 100
+TEXT_CACHE_BYTES = 16 * 1024 * 1024  # Rasterized strings kept between frames
+DIRTY_RECT_RENDERING = os.environ.get('NVWA_DIRTY_RECTS', '1') != '0'  # Set to 0 to flip every frame
+WINDOWED = os.environ.get('NVWA_WINDOWED') == '1'  # Resizable window instead of fullscreen
+ASSET_LOADER_WORKERS = min(4, os.cpu_count() or 1)
+ASSET_CACHE_DIR = os.environ.get('NVWA_ASSET_CACHE', '.asset_cache')  # Empty string disables the on-disk cache
+ASSET_CACHE_BYTES = int(os.environ.get('NVWA_ASSET_CACHE_MB', 2048)) * 1024 * 1024  # Least recently used entries go past it
+GAME_SEED = os.environ.get('NVWA_SEED')  # Fixes the dice and event sequence
+REPLAY_DIR = os.environ.get('NVWA_REPLAYS', 'replays')  # Where finished games are recorded; empty disables it
+PROFILE = os.environ.get('NVWA_PROFILE') == '1'  # Start with the frame profiler overlay on; F3 toggles it
+PROFILE_PATH = os.environ.get('NVWA_PROFILE_OUT', 'frame_profile.json')
+PROFILE_REFRESH_MS = 250  # Idle wake-up interval while the overlay is showing
+AUTOSAVE_PATH = os.environ.get('NVWA_AUTOSAVE', 'autosave.nvs')  # Snapshot of the game in progress; empty disables it
+EVENT_LOG_PATH = os.environ.get('NVWA_EVENT_LOG', os.path.join('logs', 'events.jsonl'))  # Empty keeps records in memory only
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -28,89 +67,354 @@ LIGHT_BLUE = (173, 216, 230)
 ORANGE = (255, 165, 0)
 TEXT_COLOR = (208, 107, 55)  # #D06B37
 
-pygame.font.init()
-
-try:
-
-    TITLE_FONT = pygame.font.SysFont('microsoftyahei', 56, bold=True)
-    EVENT_FONT = pygame.font.SysFont('microsoftyahei', 40, bold=True)
-    TEXT_FONT = pygame.font.SysFont('microsoftyahei', 32, bold=True)
-    SMALL_FONT = pygame.font.SysFont('microsoftyahei', 28, bold=True)
-    TINY_FONT = pygame.font.SysFont('microsoftyahei', 24, bold=True)
-except:
-
-    try:
-        TITLE_FONT = pygame.font.SysFont('simsun', 56, bold=True)
-        EVENT_FONT = pygame.font.SysFont('simsun', 40, bold=True)
-        TEXT_FONT = pygame.font.SysFont('simsun', 32, bold=True)
-        SMALL_FONT = pygame.font.SysFont('simsun', 28, bold=True)
-        TINY_FONT = pygame.font.SysFont('simsun', 24, bold=True)
-    except:
-
-        TITLE_FONT = pygame.font.Font(None, 56)
-        TITLE_FONT.set_bold(True)
-        EVENT_FONT = pygame.font.Font(None, 40)
-        EVENT_FONT.set_bold(True)
-        TEXT_FONT = pygame.font.Font(None, 32)
-        TEXT_FONT.set_bold(True)
-        SMALL_FONT = pygame.font.Font(None, 28)
-        SMALL_FONT.set_bold(True)
-        TINY_FONT = pygame.font.Font(None, 24)
-        TINY_FONT.set_bold(True)
-
-class Race:
+# Fonts are shared between the main thread and the asset loader's placeholder rendering.
+# Reentrant because a lazy font resolves itself while the caller already holds the lock.
+FONT_LOCK = threading.RLock()
 
-    def __init__(self):
-        self.population = 5
-        self.food = 0
-        self.defense = 0
-        self.tech = 0
-        self.round = 1
-
-    def is_alive(self):
-        return self.population > 0
-
-class RandomEvent:
-
-    def __init__(self, name, gif_frames, population_change, description=""):
-        self.name = name
-        self.gif_frames = gif_frames
-        self.population_change = population_change
-        self.description = description
-        self.current_frame = 0
-        self.frame_counter = 0
-        self.frame_delay = 3
+def load_font(size):
+
+    for name in ('microsoftyahei', 'simsun'):
+        try:
+            return pygame.font.SysFont(name, size, bold=True)
+        except Exception:
+            pass
+
+    font = pygame.font.Font(None, size)
+    font.set_bold(True)
+    return font
+
+class LazyFont:
+
+    # Stands in for a pygame Font; the system font lookup, which scans every installed font, runs on first use
+    def __init__(self, point_size):
+        self.point_size = point_size
+        self.font = None
+
+    def resolve(self):
+
+        with FONT_LOCK:
+            if self.font is None:
+                with STARTUP.span('font', f"SysFont {self.point_size}pt"):
+                    self.font = load_font(self.point_size)
+        return self.font
+
+    def __getattr__(self, name):
+        return getattr(self.font or self.resolve(), name)
+
+TITLE_FONT = LazyFont(56)
+EVENT_FONT = LazyFont(40)
+TEXT_FONT = LazyFont(32)
+SMALL_FONT = LazyFont(28)
+TINY_FONT = LazyFont(24)
+
+def resolve_fonts():
+
+    for font in (TITLE_FONT, EVENT_FONT, TEXT_FONT, SMALL_FONT, TINY_FONT):
+        font.resolve()
+
+def ticks_ms():
+
+    # pygame.time.get_ticks() stays at 0 unless pygame.init() started the timer subsystem
+    return int(time.monotonic() * 1000)
+
+@lru_cache(maxsize=256)
+def fit_font(text, max_width):
+
+    # Status panels fall back to the tiny font when a line does not fit
+    with FONT_LOCK:
+        if SMALL_FONT.size(text)[0] > max_width:
+            return TINY_FONT
+    return SMALL_FONT
+
+def render_locked(font, text, antialias, color):
+
+    with FONT_LOCK:
+        return font.render(text, antialias, color)
+
+def convert_surface(surface):
+
+    # Only keep per-pixel alpha for assets that actually use it
+    if surface.get_flags() & pygame.SRCALPHA or surface.get_colorkey() is not None:
+        width, height = surface.get_size()
+        if pygame.mask.from_surface(surface, 254).count() < width * height:
+            return surface.convert_alpha()
+    return surface.convert()
+
+RESOURCE_CHOICES = (
+    ("Food", "food", GREEN),
+    ("Defense", "defense", BLUE),
+    ("Technology", "tech", ORANGE)
+)
+
+EMPTY_WIDGET_TREE = WidgetTree()
+
+UI_FILES = {
+    'title': '标题.png',
+    'start_button': '开始按钮.png',
+    'text_box': '文字框.png',
+    'option_h': '选项框（横板）.png',
+    'option_v': '选项框（竖版）.png'
+}
+
+EVENT_GIF_FILES = {
+    'drought': '干旱.gif',
+    'harvest': '丰收.gif',
+    'winter': '寒冬.gif',
+    'flood': '洪水.gif',
+    'fertile_land': '发现沃土.gif'
+}
+
+ENDING_FILES = {
+    'extinction': '种族灭绝.png',
+    'primitive': '原始永恒.png',
+    'prosperous': '人口繁盛.png',
+    'agricultural': '农耕时代.png',
+    'scientific': '科学革命.png',
+    'utopia': '乌托邦.png',
+    'ai_crisis': '智能危机.png',
+    'population_overload': '人口过载.png'
+}
+
+class AssetLoader:
+
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asset-loader')
+        self.futures = {}
+
+    def submit(self, name, load, *args):
+
+        self.futures[name] = self.executor.submit(self.traced, name, load, *args)
+
+    @staticmethod
+    def traced(name, load, *args):
+
+        with STARTUP.span('asset', str(name)):
+            return load(*args)
+
+    def get(self, name, default=None):
+
+        future = self.futures.get(name)
+        if future is None:
+            return default
+
+        # Blocking fallback for states that need an asset before the background load finished
+        if not future.done():
+            started = time.perf_counter()
+            value = future.result()
+            print(f"Waited {(time.perf_counter() - started) * 1000:.0f}ms for asset {name}")
+            return value
+        return future.result()
+
+    def on_finished(self, callback):
+
+        # Calls back once, from whichever thread completes the last load submitted so far
+        pending = list(self.futures.values())
+        remaining = [len(pending)]
+        lock = threading.Lock()
+
+        def done(future):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and not future.cancelled():
+                callback()
+
+        for future in pending:
+            future.add_done_callback(done)
+
+    def shutdown(self):
+
+        # Loads still queued are dropped; one already running finishes, since it calls into pygame
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+class EventAnimation:
+
+    def __init__(self, key, frames, durations, source_path=None, store=None):
+        self.key = key
+        self.source_path = source_path
+        self.frames = frames  # Surfaces, or frame ids when the pixels live in store
+        self.store = store
+        self.size = None
+        if frames:
+            self.size = store.frame_size(frames[0]) if store else frames[0].get_size()
+        self.durations = durations
+        self.frame_ends = list(accumulate(durations))
+        self.total_duration = self.frame_ends[-1] if self.frame_ends else 0
+
+    def frame_index_at(self, elapsed_ms):
+
+        if len(self.frames) <= 1 or self.total_duration <= 0:
+            return 0
+        return bisect_right(self.frame_ends, elapsed_ms % self.total_duration)
+
+    def frame(self, index):
+
+        # Frames the store has evicted are decompressed again here
+        return self.store.get(self.frames[index]) if self.store else self.frames[index]
+
+    def ms_until_next_frame(self, elapsed_ms):
+
+        if len(self.frames) <= 1 or self.total_duration <= 0:
+            return None
+        position = elapsed_ms % self.total_duration
+        return self.frame_ends[bisect_right(self.frame_ends, position)] - position
+
+    def scaled_bytes(self, size):
+        return size[0] * size[1] * 4 * len(self.frames)
+
+class Layout:
+
+    def __init__(self, width, height, title_size=None, start_button_size=None):
+        self.width = width
+        self.height = height
+        self.size = (width, height)
+
+        # Start screen: the title and start button keep their artwork's aspect ratio
+        self.title = None
+        if title_size:
+            title_width = int(width * 0.4)
+            title_height = int(title_size[1] * (title_width / title_size[0]))
+            self.title = pygame.Rect(width // 2 - title_width // 2, height // 3 - title_height // 2,
+                                     title_width, title_height)
+
+        if start_button_size:
+            button_width = int(width * 0.1)
+            button_height = int(start_button_size[1] * (button_width / start_button_size[0]))
+            self.start_button = pygame.Rect(width // 2 - button_width // 2, int(height * 0.55),
+                                            button_width, button_height)
+        else:
+            self.start_button = pygame.Rect(width // 2 - 150, height // 2, 300, 100)
+
+        # Round screens: status and hint panels on top, resource buttons and dice below
+        top_height = int(height * 0.4)
+        self.status_box = pygame.Rect(int(width * 0.05), int(height * 0.05), int(width * 0.18),
+                                      top_height - int(height * 0.05))
+
+        hint_box_x = self.status_box.right + int(width * 0.03)
+        self.hint_box = pygame.Rect(hint_box_x, self.status_box.y, int(width * 0.95) - hint_box_x,
+                                    self.status_box.height)
+
+        column_spacing = int(width * 0.02)
+        column_width = (self.hint_box.width - column_spacing) // 2
+        bottom_y = top_height + int(height * 0.03)
+        bottom_height = int(height * 0.95) - bottom_y
+
+        self.dice_box = pygame.Rect(hint_box_x + column_width + column_spacing, bottom_y, column_width, bottom_height)
+        dice_size = int(min(column_width, bottom_height) * 0.45)
+        self.dice = pygame.Rect(self.dice_box.centerx - dice_size // 2,
+                                self.dice_box.y + self.dice_box.height // 2 - dice_size // 2 + int(bottom_height * 0.05),
+                                dice_size, dice_size)
+
+        button_spacing = int(bottom_height * 0.05)
+        button_height = (bottom_height - button_spacing * 2) // 3
+        self.resource_buttons = {}
+        for i, resource_type in enumerate(["food", "defense", "tech"]):
+            self.resource_buttons[resource_type] = pygame.Rect(hint_box_x, bottom_y + i * (button_height + button_spacing),
+                                                               column_width, button_height)
+
+        # Event screen
+        desc_box_width = int(width * 0.5)
+        desc_box_height = int(height * 0.35)
+        self.desc_box = pygame.Rect(width // 2 - desc_box_width // 2, height // 2 - desc_box_height // 2,
+                                    desc_box_width, desc_box_height)
+        confirm_width = int(width * 0.15)
+        self.confirm_button = pygame.Rect(width // 2 - confirm_width // 2, self.desc_box.bottom + int(height * 0.05),
+                                          confirm_width, int(height * 0.08))
+
+        # Ending screen
+        left_box_height = int(height * 0.5)
+        self.ending_box = pygame.Rect(int(width * 0.08), height // 2 - left_box_height // 2,
+                                      int(width * 0.45), left_box_height)
+        self.final_stats_box = pygame.Rect(self.ending_box.right + int(width * 0.05), self.ending_box.y,
+                                           int(width * 0.25), left_box_height)
+        self.restart_button = pygame.Rect(self.final_stats_box.x, self.final_stats_box.bottom + int(height * 0.03),
+                                          self.final_stats_box.width, int(height * 0.1))
 
 class Game:
 
     def __init__(self):
 
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.FULLSCREEN)
+        with STARTUP.span('init', 'window'):
+            self.display_flags = pygame.RESIZABLE if WINDOWED else pygame.FULLSCREEN
+            self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), self.display_flags)
         pygame.display.set_caption("Short-Lived Race Simulator")
         self.clock = pygame.time.Clock()
-        self.race = Race()
+        self.surface_cache = SurfaceCache(SURFACE_CACHE_BYTES)
+        self.text_cache = SurfaceCache(TEXT_CACHE_BYTES)
+        self.engine = Engine(seed=int(GAME_SEED) if GAME_SEED else None)
+        self.replay_dir = REPLAY_DIR
+        self.profiler = FrameProfiler(PROFILE)
+        self.autosaver = Autosaver(AUTOSAVE_PATH) if AUTOSAVE_PATH else None
         self.game_over = False
         self.game_started = False
 
         self.state = "START"
 
-        self.dice_images = self.load_dice_images()
         self.dice_animating = False
         self.dice_animation_frame = 0
         self.dice_result = 1
         self.resource_points = 0
 
         self.current_event = None
-        self.event_log = []
+        self.event_started_at = 0
+        self.event_log = EventLog(EVENT_LOG_PATH)  # Outlives reset_game, so it spans every game of the session
+
+        self.event_cache = SurfaceCache(EVENT_CACHE_BYTES)
+        self.frame_store = FrameStore(FRAME_STORE_BYTES)
+        self.event_scale_jobs = {}
+        self.closing = False  # Tells pre-scaling jobs to stop early
+
+        self.last_scene = None
 
-        self.ui_images = self.load_ui_images()
-        self.event_gifs = self.load_event_gifs()
-        self.ending_images = self.load_ending_images()
         self.ending_type = None
 
-        self.background_image = self.load_background_image()
+        self.bundle = AssetBundle(ASSET_CACHE_DIR, ASSET_CACHE_BYTES) if ASSET_CACHE_DIR else None
+        self.conversions = {'opaque': 0, 'alpha': 0, 'raw_ms': 0.0, 'converted_ms': 0.0}
+        self.conversion_lock = threading.Lock()
+
+        # The font scan overlaps the start screen's synchronous loads
+        self.assets = AssetLoader(ASSET_LOADER_WORKERS)
+        self.assets.submit('fonts', resolve_fonts)
+
+        # Only the start screen's assets are loaded before the first frame
+        with STARTUP.span('asset', 'ui'):
+            self.ui_images = self.load_ui_images()
+        self.layout = self.create_layout(*self.screen.get_size())
+        self.build_widgets()
+        with STARTUP.span('asset', 'background'):
+            self.background_image = self.load_background_image()
+
+        self.assets.submit('dice', self.load_dice_images)
+        for key, filename in EVENT_GIF_FILES.items():
+            self.assets.submit(('event', key), self.load_event_gif, key, filename)
+        for key, filename in ENDING_FILES.items():
+            self.assets.submit(('ending', key), self.load_ending_image, key, filename)
+        self.assets.on_finished(self.report_conversions)
+
+        self.random_events = self.engine.events
+
+        self.saved_state = self.state
+        self.resume_autosave()
 
-        self.random_events = self.create_random_events()
+    def load_bundled(self, variant, img_path, size, decode):
+
+        # Decoded and pre-scaled pixels come straight from the memory-mapped bundle when present
+        if self.bundle:
+            bundled = self.bundle.load(variant, img_path, size)
+            if bundled is not None:
+                return bundled
+
+        frames, durations = decode()
+        if self.bundle:
+            self.bundle.store(variant, img_path, frames, durations, size)
+        return frames, durations
+
+    def decode_image(self, img_path, *sizes):
+
+        img = pygame.image.load(img_path)
+        for size in sizes:
+            img = pygame.transform.scale(img, size)
+        return self.convert_assets([img]), [0]
 
     def load_dice_images(self):
 
@@ -118,10 +422,9 @@ class Game:
         for i in range(1, 7):
             try:
                 img_path = os.path.join("static", "骰子", f"{i}.png")
-                img = pygame.image.load(img_path)
-
-                img = pygame.transform.scale(img, (200, 200))
-                dice_images.append(img)
+                frames, _ = self.load_bundled('dice', img_path, (200, 200),
+                                              lambda: self.decode_image(img_path, (200, 200)))
+                dice_images.append(frames[0])
             except Exception as e:
                 print(f"Failed to load dice image {i}.png: {e}")
 
@@ -131,176 +434,338 @@ class Game:
                 font = pygame.font.Font(None, 100)
                 text = font.render(str(i), True, TEXT_COLOR)
                 placeholder.blit(text, (75, 50))
-                dice_images.append(placeholder)
+                dice_images.append(self.convert_assets([placeholder])[0])
         return dice_images
 
     def load_ui_images(self):
 
         ui_images = {}
-        ui_files = {
-            'title': '标题.png',
-            'start_button': '开始按钮.png',
-            'text_box': '文字框.png',
-            'option_h': '选项框（横板）.png',
-            'option_v': '选项框（竖版）.png'
-        }
-        for key, filename in ui_files.items():
+        for key, filename in UI_FILES.items():
             try:
                 img_path = os.path.join("static", "UI", filename)
-                img = pygame.image.load(img_path)
-                ui_images[key] = img
+                frames, _ = self.load_bundled('ui', img_path, None, lambda: self.decode_image(img_path))
+                ui_images[key] = frames[0]
             except Exception as e:
                 print(f"Failed to load UI image {filename}: {e}")
                 ui_images[key] = None
         return ui_images
 
-    def load_event_gifs(self):
+    def load_event_gif(self, key, filename):
 
-        event_gifs = {}
-        event_files = {
-            'drought': '干旱.gif',
-            'harvest': '丰收.gif',
-            'winter': '寒冬.gif',
-            'flood': '洪水.gif',
-            'fertile_land': '发现沃土.gif'
-        }
-        for key, filename in event_files.items():
+        img_path = os.path.join("static", "随机事件gif", filename)
+
+        # A bundle hit already holds the frames at display size, skipping decode and scaling
+        if self.bundle:
             try:
-                img_path = os.path.join("static", "随机事件gif", filename)
+                bundled = self.bundle.load('event', img_path, self.layout.size)
+            except Exception as e:
+                print(f"Failed to read bundled event image {filename}: {e}")
+                bundled = None
+            if bundled is not None:
+                return EventAnimation(key, bundled[0], bundled[1], img_path)
 
-                pil_image = Image.open(img_path)
-                frames = []
+        try:
+            # PIL is only needed to decode GIFs, so it is imported here rather than at startup
+            from PIL import Image, ImageSequence
 
-                for frame in ImageSequence.Iterator(pil_image):
+            pil_image = Image.open(img_path)
+            frame_ids = []
+            durations = []
 
-                    frame = frame.convert('RGBA')
+            for frame in ImageSequence.Iterator(pil_image):
 
-                    frame_str = frame.tobytes()
-                    frame_surface = pygame.image.fromstring(frame_str, frame.size, 'RGBA')
+                # Browsers treat missing or near-zero delays as 100ms, do the same
+                duration = frame.info.get('duration') or 0
+                durations.append(duration if duration >= 20 else DEFAULT_GIF_FRAME_MS)
 
-                    frame_surface = pygame.transform.scale(frame_surface, (400, 300))
-                    frames.append(frame_surface)
+                frame = frame.convert('RGBA')
 
-                event_gifs[key] = frames
-                print(f"Successfully loaded {filename}, {len(frames)} frames")
-            except Exception as e:
-                print(f"Failed to load event image {filename}: {e}")
-
-                placeholder = pygame.Surface((400, 300))
-                placeholder.fill(LIGHT_BLUE)
-                pygame.draw.rect(placeholder, BLACK, (0, 0, 400, 300), 3)
-                text = SMALL_FONT.render(key, True, TEXT_COLOR)
-                placeholder.blit(text, (200 - text.get_width()//2, 140))
-                event_gifs[key] = [placeholder]
-        return event_gifs
-
-    def load_ending_images(self):
-
-        ending_images = {}
-        ending_files = {
-            'extinction': '种族灭绝.png',
-            'primitive': '原始永恒.png',
-            'prosperous': '人口繁盛.png',
-            'agricultural': '农耕时代.png',
-            'scientific': '科学革命.png',
-            'utopia': '乌托邦.png',
-            'ai_crisis': '智能危机.png',
-            'population_overload': '人口过载.png'
-        }
-        for key, filename in ending_files.items():
-            try:
-                img_path = os.path.join("static", "游戏结局png", filename)
-                img = pygame.image.load(img_path)
-                img = pygame.transform.scale(img, (800, 500))
-                ending_images[key] = img
-            except Exception as e:
-                print(f"Failed to load ending image {filename}: {e}")
+                frame_str = frame.tobytes()
+                frame_surface = pygame.image.fromstring(frame_str, frame.size, 'RGBA')
+
+                # One frame at a time into the store, so a whole decoded GIF is never held at once
+                frame_ids.append(self.frame_store.add(self.convert_assets([frame_surface])[0]))
+
+            print(f"Successfully loaded {filename}, {len(frame_ids)} frames ({len(set(frame_ids))} unique)")
+        except Exception as e:
+            print(f"Failed to load event image {filename}: {e}")
+
+            placeholder = pygame.Surface((400, 300))
+            placeholder.fill(LIGHT_BLUE)
+            pygame.draw.rect(placeholder, BLACK, (0, 0, 400, 300), 3)
+            text = render_locked(SMALL_FONT, key, True, TEXT_COLOR)
+            placeholder.blit(text, (200 - text.get_width()//2, 140))
+            frame_ids = [self.frame_store.add(self.convert_assets([placeholder])[0])]
+            durations = [DEFAULT_GIF_FRAME_MS]
+            img_path = None
+
+        self.frame_store.register(key, frame_ids)
+        return EventAnimation(key, frame_ids, durations, img_path, self.frame_store)
+
+    def load_ending_image(self, key, filename):
 
-                placeholder = pygame.Surface((800, 500))
-                placeholder.fill(DARK_GRAY)
-                pygame.draw.rect(placeholder, BLACK, (0, 0, 800, 500), 3)
-                text = EVENT_FONT.render(key, True, WHITE)
-                placeholder.blit(text, (400 - text.get_width()//2, 240))
-                ending_images[key] = placeholder
-        return ending_images
+        try:
+            img_path = os.path.join("static", "游戏结局png", filename)
+            frames, _ = self.load_bundled('ending', img_path, self.layout.size,
+                                          lambda: self.decode_image(img_path, (800, 500), self.layout.size))
+            return frames[0]
+        except Exception as e:
+            print(f"Failed to load ending image {filename}: {e}")
+
+            img = pygame.Surface((800, 500))
+            img.fill(DARK_GRAY)
+            pygame.draw.rect(img, BLACK, (0, 0, 800, 500), 3)
+            text = render_locked(EVENT_FONT, key, True, WHITE)
+            img.blit(text, (400 - text.get_width()//2, 240))
+            return self.convert_assets([img])[0]
 
     def load_background_image(self):
 
         try:
             img_path = os.path.join("static", "游戏结局png", "原始永恒.png")
-            img = pygame.image.load(img_path)
+            frames, _ = self.load_bundled('background', img_path, self.layout.size,
+                                          lambda: self.decode_image(img_path, self.layout.size))
 
-            img = pygame.transform.scale(img, (WINDOW_WIDTH, WINDOW_HEIGHT))
             print("Successfully loaded background image: 原始永恒.png")
-            return img
+            return frames[0]
         except Exception as e:
             print(f"Failed to load background image: {e}")
+            return None
 
-            background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-            background.fill(WHITE)
-            return background
-
-    def create_random_events(self):
-
-        events = [
-            RandomEvent("Drought", self.event_gifs.get('drought'), -1,
-                       "Severe drought strikes the land,\nwithering crops and drying wells"),
-            RandomEvent("Harvest", self.event_gifs.get('harvest'), 2,
-                       "Abundant harvest brings prosperity,\nfood stores overflow with plenty"),
-            RandomEvent("Winter", self.event_gifs.get('winter'), -1,
-                       "Harsh winter descends upon the land,\nfreezing temperatures take their toll"),
-            RandomEvent("Flooding", self.event_gifs.get('flood'), -2,
-                       "Heavy rain triggers flooding,\nsubmerging habitats"),
-            RandomEvent("Fertile Land", self.event_gifs.get('fertile_land'), 2,
-                       "Discovery of fertile new lands,\nexpanding territory and resources")
-        ]
-        return events
+    def convert_assets(self, surfaces):
 
-    def determine_ending(self):
+        converted_surfaces = []
+        for surface in surfaces:
+
+            converted = convert_surface(surface)
+            converted_surfaces.append(converted)
+            raw_ms = converted_ms = 0.0
+
+            # Timing blits only while tracing startup. Runs on loader threads too, so they go to a
+            # scratch surface, never the display
+            if STARTUP.enabled:
+                scratch = pygame.Surface(surface.get_size(), 0, self.screen)
+                started = time.perf_counter()
+                scratch.blit(surface, (0, 0))
+                raw_ms = (time.perf_counter() - started) * 1000
+                started = time.perf_counter()
+                scratch.blit(converted, (0, 0))
+                converted_ms = (time.perf_counter() - started) * 1000
+
+            with self.conversion_lock:
+                self.conversions['alpha' if converted.get_flags() & pygame.SRCALPHA else 'opaque'] += 1
+                self.conversions['raw_ms'] += raw_ms
+                self.conversions['converted_ms'] += converted_ms
+        return converted_surfaces
+
+    def report_conversions(self):
+
+        with self.conversion_lock:
+            summary = dict(self.conversions)
+        if not summary['opaque'] + summary['alpha']:
+            return  # Everything came from the bundle, already in display format
+
+        timing = ""
+        if summary['converted_ms']:
+            speedup = summary['raw_ms'] / summary['converted_ms']
+            timing = f": blit {summary['raw_ms']:.1f}ms -> {summary['converted_ms']:.1f}ms ({speedup:.1f}x)"
+        print(f"Converted {summary['opaque'] + summary['alpha']} assets to display format "
+              f"({summary['opaque']} opaque, {summary['alpha']} per-pixel alpha){timing}")
+
+    @property
+    def dice_images(self):
+        return self.assets.get('dice')
 
-        x = self.race.population
-        food = self.race.food
-        defense = self.race.defense
-        tech = self.race.tech
+    def event_animation(self, event=None):
 
-        if x == 0:
-            return 'extinction'
+        event = event or self.current_event
+        if event is None:
+            return None
+        return self.assets.get(('event', event.animation_key))
 
-        if 0 < x <= 7:
-            return 'primitive'
+    def ending_image(self, ending_type):
+        return self.assets.get(('ending', ending_type))
 
-        if 7 < x <= 10:
+    def create_layout(self, width, height):
 
-            if food >= 8 and tech >= 5:
-                return 'agricultural'
+        title = self.ui_images.get('title')
+        start_button = self.ui_images.get('start_button')
+        return Layout(width, height,
+                      title.get_size() if title else None,
+                      start_button.get_size() if start_button else None)
 
-            if food >= 10 and 3 <= defense < 5 and tech >= 8:
-                return 'scientific'
+    def resize(self, width, height):
 
-            if food >= 10 and tech >= 10:
-                return 'utopia'
+        if (width, height) == self.layout.size:
+            return
+
+        # Same flags the window was opened with, so a fullscreen game never drops into a window
+        self.screen = pygame.display.set_mode((width, height), self.display_flags)
+        self.layout = self.create_layout(*self.screen.get_size())
+
+        # Everything scaled for the old geometry is stale now
+        self.surface_cache.clear()
+        self.event_cache.clear()
+        self.build_widgets()
+        self.request_full_redraw()
+
+    def build_widgets(self):
+
+        layout = self.layout
+
+        def panel(skin, rect, fill_color):
+            return Panel(rect, partial(self.scaled_ui, skin, rect.size), fill_color)
+
+        self.panels = {
+            'status': panel('option_v', layout.status_box, (210, 180, 140)),
+            'hint': panel('text_box', layout.hint_box, (240, 230, 200)),
+            'dice': panel('option_v', layout.dice_box, (240, 230, 200)),
+            'desc': panel('text_box', layout.desc_box, (240, 230, 200)),
+            'ending': panel('text_box', layout.ending_box, (240, 230, 200)),
+            'final_stats': panel('option_v', layout.final_stats_box, (210, 180, 140)),
+        }
+        self.status = self.status_column(layout.status_box, 0.22)
+        self.final_stats = self.status_column(layout.final_stats_box, 0.15)
+
+        # Buttons over a cached layer render both looks once on top of it
+        self.buttons = {
+            'start': Button(layout.start_button, self.start_game, self.paint_start_button, self.state_layer,
+                            hoverable=not self.ui_images.get('start_button')),
+            'dice': Button(layout.dice, self.start_roll),
+            'confirm': Button(layout.confirm_button, self.next_round, partial(self.paint_button, label="Confirm")),
+            'restart': Button(layout.restart_button, self.reset_game, partial(self.paint_button, label="Restart"),
+                              self.state_layer),
+        }
+        for label, resource_type, color in RESOURCE_CHOICES:
+            self.buttons[resource_type] = Button(layout.resource_buttons[resource_type],
+                                                 partial(self.allocate_resource, resource_type),
+                                                 partial(self.paint_button, label=label, hover_color=color),
+                                                 self.state_layer)
+
+        # What each state draws on top of its layer, in drawing order; clicks and hover go through these
+        self.widget_trees = {
+            "START": WidgetTree([self.buttons['start']]),
+            "DICE_READY": WidgetTree([self.status, self.buttons['dice']]),
+            "DICE": WidgetTree([self.status]),
+            "RESOURCE_CHOICE": WidgetTree([self.status] + [self.buttons[resource_type]
+                                                          for _, resource_type, _ in RESOURCE_CHOICES]),
+            "EVENT": WidgetTree([self.panels['status'], self.status, self.panels['desc'], self.buttons['confirm']]),
+            "GAME_OVER": WidgetTree([self.final_stats, self.buttons['restart']]),
+        }
+
+    def status_column(self, box, indent):
+
+        labels = [Label(self.render_text, SMALL_FONT, color=TEXT_COLOR) for _ in range(5)]
+        return Column(box, labels, int(box.height * 0.05), int(box.width * indent))
+
+    def widgets(self):
+        return self.widget_trees.get(self.state, EMPTY_WIDGET_TREE)
+
+    def scaled(self, key, surface, size):
+
+        size = (int(size[0]), int(size[1]))
+        if surface.get_size() == size:
+            return surface
+        return self.surface_cache.get((key, size), lambda: pygame.transform.scale(surface, size))
+
+    def scaled_ui(self, key, size):
 
-            return 'prosperous'
+        image = self.ui_images.get(key)
+        if image is None:
+            return None
+        return self.scaled(key, image, size)
 
-        if x >= 10:
-            # AI Crisis: Food ≥ 8, Defense ≥ 25, Technology ≥ 10, and Population ≥ 10
-            if food >= 8 and defense >= 25 and tech >= 10:
-                return 'ai_crisis'
-            # Population Overload
-            return 'population_overload'
+    def render_text(self, font, text, color, antialias=True):
 
-        return 'prosperous'
+        key = (font, text, color, antialias)
+        return self.text_cache.get(key, lambda: render_locked(font, text, antialias, color))
+
+    def scaled_event_frames(self, animation, size):
+
+        if animation.store is None and animation.size == size:
+            return animation.frames
+
+        key = (animation.key, size)
+        frames = self.event_cache.lookup(key)
+        if frames is not None:
+            return frames
+
+        # Memory-mapped frames are file backed and paged in on demand, so they cost no budget
+        bundled = self.bundle.load('event', animation.source_path, size) if self.bundle and animation.source_path else None
+        if bundled is not None:
+            self.event_cache.put(key, bundled[0], 0)
+            return bundled[0]
+
+        if key not in self.event_scale_jobs:
+            job = threading.Thread(target=self.prescale_event_frames, args=(animation, size), daemon=True)
+            self.event_scale_jobs[key] = job
+            job.start()
+        return None
+
+    def prescale_event_frames(self, animation, size):
+
+        key = (animation.key, size)
+        bundled = self.bundle and animation.source_path
+
+        def scaled():
+            for index in range(len(animation.frames)):
+                if self.closing:
+                    return
+                yield pygame.transform.scale(animation.frame(index), size)
+
+        try:
+            if animation.scaled_bytes(size) <= self.event_cache.max_bytes:
+                frames = list(scaled())
+                if len(frames) < len(animation.frames):
+                    return
+                self.event_cache.put(key, frames, animation.scaled_bytes(size))
+                if bundled:
+                    self.bundle.store('event', animation.source_path, frames, animation.durations, size)
+                return
+
+            # Too big for the budget: written to the bundle a frame at a time and played from the memory map
+            if bundled:
+                self.bundle.store('event', animation.source_path, scaled(), animation.durations, size)
+                loaded = self.bundle.load('event', animation.source_path, size)
+                if loaded is not None:
+                    self.event_cache.put(key, loaded[0], 0)
+                    return
+
+            # Without a bundle only the leading frames that fit are kept; the rest are scaled as they play
+            frame_bytes = size[0] * size[1] * 4
+            count = min(self.event_cache.max_bytes // frame_bytes, len(animation.frames))
+            frames = list(islice(scaled(), count))
+            if len(frames) < count:
+                return
+            self.event_cache.put(key, frames + [None] * (len(animation.frames) - count), count * frame_bytes)
+        except Exception as e:
+            print(f"Failed to pre-scale event animation {animation.key}: {e}")
+        finally:
+            self.event_scale_jobs.pop((animation.key, size), None)
+
+    @property
+    def race(self):
+        return self.engine.race
+
+    def determine_ending(self):
+
+        return determine_ending(self.race)
 
     def start_game(self):
 
         self.game_started = True
         self.state = "DICE_READY"
 
+    def start_roll(self):
+
+        self.state = "DICE"
+        self.start_dice_animation()
+
     def start_dice_animation(self):
 
         self.dice_animating = True
         self.dice_animation_frame = 0
-        self.dice_result = random.randint(1, 6)
+        self.dice_result = self.engine.roll_dice()
 
     def update_dice_animation(self):
 
@@ -314,41 +779,29 @@ class Game:
 
     def allocate_resource(self, resource_type):
 
-        if resource_type == "food":
-            self.race.food += self.resource_points
-        elif resource_type == "defense":
-            self.race.defense += self.resource_points
-        elif resource_type == "tech":
-            self.race.tech += self.resource_points
+        self.engine.allocate_resource(resource_type, self.resource_points)
 
         self.trigger_random_event()
 
     def trigger_random_event(self):
 
-        self.current_event = random.choice(self.random_events)
-
         old_population = self.race.population
 
-        self.race.population += self.current_event.population_change
-
-        if self.race.population < 0:
-            self.race.population = 0
+        self.current_event = self.engine.trigger_random_event()
 
         self.state = "EVENT"
+        self.event_started_at = ticks_ms()
 
-        self.event_log.append(f"Round {self.race.round}: {self.current_event.name} (Population {self.current_event.population_change:+d})")
+        # Start pre-scaling in the background; the first frames are scaled on the fly
+        animation = self.event_animation()
+        if animation:
+            self.scaled_event_frames(animation, self.layout.size)
 
-        print(f"Event triggered: {self.current_event.name}, Population change: {old_population} -> {self.race.population}")
+        self.event_log.record(self.engine.seed, self.race.round, self.current_event, old_population, self.race)
 
     def next_round(self):
 
-        if not self.race.is_alive():
-            self.end_game()
-            return
-
-        self.race.round += 1
-
-        if self.race.round > MAX_ROUNDS:
+        if self.engine.next_round():
             self.end_game()
         else:
 
@@ -360,17 +813,136 @@ class Game:
         self.state = "GAME_OVER"
         self.game_over = True
 
+        if self.replay_dir:
+            try:
+                path = Replay.from_engine(self.engine).save(self.replay_dir)
+                print(f"Replay saved to {path}")
+            except (OSError, ValueError) as e:
+                # ValueError: an ending name in rules.json that is not ASCII or longer than 255 bytes
+                print(f"Failed to save replay: {e}")
+
+    def event_frame_index(self):
+
+        animation = self.event_animation()
+        if not animation or not animation.frames:
+            return 0
+        return animation.frame_index_at(ticks_ms() - self.event_started_at)
+
+    def scene_key(self):
+
+        # Everything that changes the picture apart from hover highlights
+        key = (self.state, self.layout.size, self.race.round, self.race.population, self.race.food,
+               self.race.defense, self.race.tech, self.dice_result, self.dice_animating, self.current_event,
+               self.ending_type)
+        if self.state == "EVENT":
+            key += (self.event_frame_index(),)
+        return key
+
+    def request_full_redraw(self):
+
+        self.last_scene = None
+
     def draw(self):
 
-        if self.background_image:
-            self.screen.blit(self.background_image, (0, 0))
-        else:
-            self.screen.fill(WHITE)
+        profiler = self.profiler
+
+        if not DIRTY_RECT_RENDERING:
+            self.draw_scene()
+            profiler.mark('draw')
+            if profiler.enabled:
+                profiler.draw_overlay(self.screen)
+            pygame.display.flip()
+            profiler.mark('present')
+            return
+
+        scene = self.scene_key()
+        if scene != self.last_scene:
+            # A new screen may have appeared under a pointer that has not moved
+            self.widgets().update_hover(pygame.mouse.get_pos())
+            self.draw_scene()
+            profiler.mark('draw')
+            if profiler.enabled:
+                profiler.draw_overlay(self.screen)
+            pygame.display.flip()
+            profiler.mark('present')
+            self.last_scene = scene
+            return
+
+        # Widgets whose look changed redraw themselves if they can; anything else is redrawn as part of
+        # the scene, clipped to the changed rects
+        updated_rects = []
+        scene_rects = []
+        for widget in self.widgets().take_dirty():
+            updated_rects.append(widget.rect)
+            if not widget.redraw(self.screen):
+                scene_rects.append(widget.rect)
+
+        if self.dice_animating:
+            scene_rects.append(self.layout.dice)
+
+        # The overlay is redrawn every frame over a freshly drawn patch of scene
+        if profiler.enabled:
+            scene_rects.append(profiler.overlay_rect(self.screen))
+
+        if not updated_rects and not scene_rects:
+            return
+
+        if scene_rects:
+            self.screen.set_clip(scene_rects[0].unionall(scene_rects[1:]))
+            self.draw_scene()
+            self.screen.set_clip(None)
+        profiler.mark('draw')
+        if profiler.enabled:
+            profiler.draw_overlay(self.screen)
+        pygame.display.update(updated_rects + scene_rects)
+        profiler.mark('present')
+
+    def state_layer(self):
 
         if self.state in ["DICE_READY", "DICE", "RESOURCE_CHOICE"]:
-            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+            name = 'game'
+        elif self.state == "GAME_OVER" and self.ending_type:
+            name = ('ending', self.ending_type)
+        elif self.state == "START":
+            name = 'start'
+        else:
+            return None
+
+        key = ('layer', name, self.layout.size)
+        return self.surface_cache.get(key, lambda: self.compose_layer(name))
+
+    def compose_layer(self, name):
+
+        # Background, overlay and panel frames flattened into one opaque surface
+        layer = pygame.Surface(self.layout.size).convert()
+        self.draw_background(layer)
+
+        if name == 'start':
+            self.draw_title(layer)
+        elif name == 'game':
+            overlay = pygame.Surface(self.layout.size, pygame.SRCALPHA)
             overlay.fill((255, 255, 255, 100))
-            self.screen.blit(overlay, (0, 0))
+            layer.blit(overlay, (0, 0))
+            self.draw_game_chrome(layer)
+        else:
+            self.draw_ending_chrome(layer)
+        return layer
+
+    def draw_background(self, target):
+
+        if self.background_image:
+            target.blit(self.scaled('background', self.background_image, self.layout.size), (0, 0))
+        else:
+            target.fill(WHITE)
+
+    def draw_scene(self):
+
+        layer = self.state_layer()
+        if layer is not None:
+            self.screen.blit(layer, (0, 0))
+        elif self.state != "EVENT":
+            # The event screen draws it only where its animation frame does not cover it
+            self.draw_background(self.screen)
 
         if self.state == "START":
             self.draw_start_screen()
@@ -389,74 +961,38 @@ class Game:
         elif self.state == "GAME_OVER":
             self.draw_ending_screen()
 
-        pygame.display.flip()
-
-    def draw_start_screen(self):
-
-        if self.ui_images.get('title'):
-            title_img = self.ui_images['title']
-
-            original_width = title_img.get_width()
-            original_height = title_img.get_height()
-            target_width = int(WINDOW_WIDTH * 0.4)
-            scale_ratio = target_width / original_width
-            target_height = int(original_height * scale_ratio)
-
-            title_img_scaled = pygame.transform.scale(title_img, (target_width, target_height))
-            title_x = WINDOW_WIDTH // 2 - target_width // 2
-            title_y = WINDOW_HEIGHT // 3 - target_height // 2
-            self.screen.blit(title_img_scaled, (title_x, title_y))
-        else:
-
-            title = TITLE_FONT.render("Short-Lived Race Simulator", True, TEXT_COLOR)
-            self.screen.blit(title, (WINDOW_WIDTH // 2 - title.get_width() // 2, WINDOW_HEIGHT // 3))
+    def paint_button(self, target, rect, hover, label, hover_color=None):
 
-        if self.ui_images.get('start_button'):
-            start_btn_img = self.ui_images['start_button']
-
-            original_width = start_btn_img.get_width()
-            original_height = start_btn_img.get_height()
-            target_width = int(WINDOW_WIDTH * 0.1)
-            scale_ratio = target_width / original_width
-            target_height = int(original_height * scale_ratio)
+        text_color = TEXT_COLOR
 
-            start_btn_img_scaled = pygame.transform.scale(start_btn_img, (target_width, target_height))
-            btn_x = WINDOW_WIDTH // 2 - target_width // 2
-            btn_y = int(WINDOW_HEIGHT * 0.55)
-            self.screen.blit(start_btn_img_scaled, (btn_x, btn_y))
-
-            self.start_button_rect = pygame.Rect(btn_x, btn_y, target_width, target_height)
+        if self.ui_images.get('option_h'):
+            target.blit(self.scaled_ui('option_h', rect.size), rect.topleft)
+            if hover:
+                highlight = pygame.Surface(rect.size, pygame.SRCALPHA)
+                highlight.fill((255, 255, 255, 80))
+                target.blit(highlight, rect.topleft)
+        elif hover and hover_color:
+            pygame.draw.rect(target, hover_color, rect, border_radius=8)
+            text_color = WHITE
         else:
+            pygame.draw.rect(target, (240, 230, 200), rect, border_radius=8)
+            pygame.draw.rect(target, (101, 67, 33), rect, 3, border_radius=8)
 
-            button_rect = pygame.Rect(WINDOW_WIDTH // 2 - 150, WINDOW_HEIGHT // 2, 300, 100)
-            mouse_pos = pygame.mouse.get_pos()
-
-            if button_rect.collidepoint(mouse_pos):
-                pygame.draw.rect(self.screen, GREEN, button_rect, border_radius=10)
-            else:
-                pygame.draw.rect(self.screen, BLUE, button_rect, border_radius=10)
-            pygame.draw.rect(self.screen, BLACK, button_rect, 3, border_radius=10)
-            start_text = EVENT_FONT.render("Start Game", True, WHITE)
-            self.screen.blit(start_text, (WINDOW_WIDTH // 2 - start_text.get_width() // 2, WINDOW_HEIGHT // 2 + 30))
-
-            self.start_button_rect = button_rect
+        text = self.render_text(TEXT_FONT, label, text_color)
+        target.blit(text, (rect.centerx - text.get_width() // 2, rect.centery - text.get_height() // 2))
 
-    def draw_game_screen(self):
+    def paint_start_button(self, target, rect, hover):
 
-        top_height = int(WINDOW_HEIGHT * 0.4)
+        if self.ui_images.get('start_button'):
+            target.blit(self.scaled_ui('start_button', rect.size), rect.topleft)
+            return
 
-        status_box_x = int(WINDOW_WIDTH * 0.05)
-        status_box_y = int(WINDOW_HEIGHT * 0.05)
-        status_box_width = int(WINDOW_WIDTH * 0.18)
-        status_box_height = top_height - int(WINDOW_HEIGHT * 0.05)
+        pygame.draw.rect(target, GREEN if hover else BLUE, rect, border_radius=10)
+        pygame.draw.rect(target, BLACK, rect, 3, border_radius=10)
+        start_text = self.render_text(EVENT_FONT, "Start Game", WHITE)
+        target.blit(start_text, (rect.centerx - start_text.get_width() // 2, rect.y + 30))
 
-        if self.ui_images.get('option_v'):
-            status_bg = self.ui_images['option_v']
-            status_bg = pygame.transform.scale(status_bg, (status_box_width, status_box_height))
-            self.screen.blit(status_bg, (status_box_x, status_box_y))
-        else:
-            pygame.draw.rect(self.screen, (210, 180, 140), (status_box_x, status_box_y, status_box_width, status_box_height), border_radius=10)
-            pygame.draw.rect(self.screen, (101, 67, 33), (status_box_x, status_box_y, status_box_width, status_box_height), 3, border_radius=10)
+    def draw_status(self, column):
 
         status_items = [
             f"Round: {self.race.round}/{MAX_ROUNDS}",
@@ -466,243 +1002,110 @@ class Game:
             f"Technology: {self.race.tech}"
         ]
 
-        total_text_height = 0
-        text_surfaces = []
-        for text in status_items:
-            surf = SMALL_FONT.render(text, True, TEXT_COLOR)
-            if surf.get_width() > status_box_width - int(status_box_width * 0.25):
-                surf = TINY_FONT.render(text, True, TEXT_COLOR)
-            text_surfaces.append(surf)
-            total_text_height += surf.get_height()
-
-        line_spacing = int(status_box_height * 0.05)
-        total_text_height += line_spacing * (len(status_items) - 1)
-
-        text_x = status_box_x + int(status_box_width * 0.22)
-        text_y = status_box_y + (status_box_height - total_text_height) // 2
-
-        for surf in text_surfaces:
-            self.screen.blit(surf, (text_x, text_y))
-            text_y += surf.get_height() + line_spacing
-
-        hint_box_x = status_box_x + status_box_width + int(WINDOW_WIDTH * 0.03)
-        hint_box_y = status_box_y
-        hint_box_width = int(WINDOW_WIDTH * 0.95) - hint_box_x
-        hint_box_height = status_box_height
-
-        if self.ui_images.get('text_box'):
-            hint_bg = self.ui_images['text_box']
-            hint_bg = pygame.transform.scale(hint_bg, (hint_box_width, hint_box_height))
-            self.screen.blit(hint_bg, (hint_box_x, hint_box_y))
-        else:
-            pygame.draw.rect(self.screen, (240, 230, 200), (hint_box_x, hint_box_y, hint_box_width, hint_box_height), border_radius=10)
-            pygame.draw.rect(self.screen, (101, 67, 33), (hint_box_x, hint_box_y, hint_box_width, hint_box_height), 3, border_radius=10)
-
-    def draw_dice(self):
-
-        status_box_x = int(WINDOW_WIDTH * 0.05)
-        status_box_y = int(WINDOW_HEIGHT * 0.05)
-        status_box_width = int(WINDOW_WIDTH * 0.18)
-        top_height = int(WINDOW_HEIGHT * 0.4)
-        status_box_height = top_height - int(WINDOW_HEIGHT * 0.05)
+        # Labels only re-render, and the column only re-lays out, when a line actually changed
+        box = column.rect
+        for label, text in zip(column.children, status_items):
+            label.set_text(text, fit_font(text, box.width - int(box.width * 0.25)))
+        column.draw(self.screen)
 
-        hint_box_x = status_box_x + status_box_width + int(WINDOW_WIDTH * 0.03)
-        hint_box_y = status_box_y
-        hint_box_width = int(WINDOW_WIDTH * 0.95) - hint_box_x
-        hint_box_height = status_box_height
+    def draw_title(self, target):
 
-        if self.state == "DICE_READY":
-            hint_text = TEXT_FONT.render("Click the dice to roll!", True, TEXT_COLOR)
-            self.screen.blit(hint_text, (hint_box_x + hint_box_width // 2 - hint_text.get_width() // 2,
-                                        hint_box_y + hint_box_height // 2 - hint_text.get_height() // 2))
-        elif self.dice_animating:
-            hint_text = TEXT_FONT.render("Rolling the dice...", True, TEXT_COLOR)
-            self.screen.blit(hint_text, (hint_box_x + hint_box_width // 2 - hint_text.get_width() // 2,
-                                        hint_box_y + hint_box_height // 2 - hint_text.get_height() // 2))
+        if self.layout.title:
+            title_img_scaled = self.scaled_ui('title', self.layout.title.size)
+            target.blit(title_img_scaled, self.layout.title.topleft)
         else:
-            hint_text = TEXT_FONT.render(f"Congratulations on earning {self.dice_result}", True, TEXT_COLOR)
-            hint_text2 = TEXT_FONT.render("resource points!", True, TEXT_COLOR)
-            hint_text3 = SMALL_FONT.render("Which resource would you like to", True, TEXT_COLOR)
-            hint_text4 = SMALL_FONT.render("allocate them to?", True, TEXT_COLOR)
-
-            text_start_y = hint_box_y + int(hint_box_height * 0.25)
-            self.screen.blit(hint_text, (hint_box_x + hint_box_width // 2 - hint_text.get_width() // 2, text_start_y))
-            self.screen.blit(hint_text2, (hint_box_x + hint_box_width // 2 - hint_text2.get_width() // 2, text_start_y + 40))
-            self.screen.blit(hint_text3, (hint_box_x + hint_box_width // 2 - hint_text3.get_width() // 2, text_start_y + 90))
-            self.screen.blit(hint_text4, (hint_box_x + hint_box_width // 2 - hint_text4.get_width() // 2, text_start_y + 120))
-
-        total_bottom_width = hint_box_width
-        column_spacing = int(WINDOW_WIDTH * 0.02)
-        dice_box_width = (total_bottom_width - column_spacing) // 2
-
-        dice_box_x = hint_box_x + dice_box_width + column_spacing
-        dice_box_y = top_height + int(WINDOW_HEIGHT * 0.03)
-        dice_box_height = int(WINDOW_HEIGHT * 0.95) - dice_box_y
-
-        if self.ui_images.get('option_v'):
-            dice_bg = self.ui_images['option_v']
-            dice_bg = pygame.transform.scale(dice_bg, (dice_box_width, dice_box_height))
-            self.screen.blit(dice_bg, (dice_box_x, dice_box_y))
-        else:
-            pygame.draw.rect(self.screen, (240, 230, 200), (dice_box_x, dice_box_y, dice_box_width, dice_box_height), border_radius=10)
-            pygame.draw.rect(self.screen, (101, 67, 33), (dice_box_x, dice_box_y, dice_box_width, dice_box_height), 3, border_radius=10)
 
-        if self.state == "DICE_READY":
-            click_text = SMALL_FONT.render("Click the dice to roll", True, TEXT_COLOR)
-        else:
-            click_text = SMALL_FONT.render("", True, TEXT_COLOR)
-        self.screen.blit(click_text, (dice_box_x + dice_box_width // 2 - click_text.get_width() // 2, dice_box_y + int(dice_box_height * 0.15)))
+            title = self.render_text(TITLE_FONT, "Short-Lived Race Simulator", TEXT_COLOR)
+            target.blit(title, (self.layout.width // 2 - title.get_width() // 2, self.layout.height // 3))
 
-        if self.dice_animating:
+    def draw_start_screen(self):
 
-            dice_index = random.randint(0, 5)
-            dice_img = self.dice_images[dice_index]
-        else:
+        self.buttons['start'].draw(self.screen)
 
-            dice_img = self.dice_images[self.dice_result - 1]
+    def draw_game_chrome(self, target):
 
-        dice_size = int(min(dice_box_width, dice_box_height) * 0.45)
-        dice_img = pygame.transform.scale(dice_img, (dice_size, dice_size))
-        dice_x = dice_box_x + dice_box_width // 2 - dice_size // 2
-        dice_y = dice_box_y + dice_box_height // 2 - dice_size // 2 + int(dice_box_height * 0.05)
-        self.screen.blit(dice_img, (dice_x, dice_y))
+        for name in ('status', 'hint', 'dice'):
+            self.panels[name].draw(target)
 
-        # Store dice rect for click detection
-        self.dice_rect = pygame.Rect(dice_x, dice_y, dice_size, dice_size)
+    def draw_game_screen(self):
 
-    def draw_resource_choice(self):
+        self.draw_status(self.status)
 
-        status_box_x = int(WINDOW_WIDTH * 0.05)
-        status_box_width = int(WINDOW_WIDTH * 0.18)
-        top_height = int(WINDOW_HEIGHT * 0.4)
+    def draw_dice(self):
 
-        hint_box_x = status_box_x + status_box_width + int(WINDOW_WIDTH * 0.03)
-        hint_box_width = int(WINDOW_WIDTH * 0.95) - hint_box_x
+        hint_box = self.layout.hint_box
 
-        total_bottom_width = hint_box_width
-        column_spacing = int(WINDOW_WIDTH * 0.02)
-        button_width = (total_bottom_width - column_spacing) // 2
+        if self.state == "DICE_READY":
+            hint_text = self.render_text(TEXT_FONT, "Click the dice to roll!", TEXT_COLOR)
+            self.screen.blit(hint_text, (hint_box.centerx - hint_text.get_width() // 2,
+                                        hint_box.y + hint_box.height // 2 - hint_text.get_height() // 2))
+        elif self.dice_animating:
+            hint_text = self.render_text(TEXT_FONT, "Rolling the dice...", TEXT_COLOR)
+            self.screen.blit(hint_text, (hint_box.centerx - hint_text.get_width() // 2,
+                                        hint_box.y + hint_box.height // 2 - hint_text.get_height() // 2))
+        else:
+            hint_text = self.render_text(TEXT_FONT, f"Congratulations on earning {self.dice_result}", TEXT_COLOR)
+            hint_text2 = self.render_text(TEXT_FONT, "resource points!", TEXT_COLOR)
+            hint_text3 = self.render_text(SMALL_FONT, "Which resource would you like to", TEXT_COLOR)
+            hint_text4 = self.render_text(SMALL_FONT, "allocate them to?", TEXT_COLOR)
 
-        button_x = hint_box_x
-        start_y = top_height + int(WINDOW_HEIGHT * 0.03)
+            text_start_y = hint_box.y + int(hint_box.height * 0.25)
+            self.screen.blit(hint_text, (hint_box.centerx - hint_text.get_width() // 2, text_start_y))
+            self.screen.blit(hint_text2, (hint_box.centerx - hint_text2.get_width() // 2, text_start_y + 40))
+            self.screen.blit(hint_text3, (hint_box.centerx - hint_text3.get_width() // 2, text_start_y + 90))
+            self.screen.blit(hint_text4, (hint_box.centerx - hint_text4.get_width() // 2, text_start_y + 120))
 
-        available_height = int(WINDOW_HEIGHT * 0.95) - start_y
-        button_spacing = int(available_height * 0.05)
-        button_height = (available_height - button_spacing * 2) // 3
+        dice_box = self.layout.dice_box
 
-        choices = [
-            ("Food", "food", GREEN),
-            ("Defense", "defense", BLUE),
-            ("Technology", "tech", ORANGE)
-        ]
+        if self.state == "DICE_READY":
+            click_text = self.render_text(SMALL_FONT, "Click the dice to roll", TEXT_COLOR)
+            self.screen.blit(click_text, (dice_box.centerx - click_text.get_width() // 2, dice_box.y + int(dice_box.height * 0.15)))
 
-        mouse_pos = pygame.mouse.get_pos()
+        if self.dice_animating:
 
-        for i, (label, resource_type, color) in enumerate(choices):
-            button_y = start_y + i * (button_height + button_spacing)
-            button_rect = pygame.Rect(button_x, button_y, button_width, button_height)
+            # Cosmetic flicker only, so it stays off the engine's seeded stream
+            dice_index = random.randint(0, 5)
+        else:
 
-            if not hasattr(self, 'resource_buttons'):
-                self.resource_buttons = {}
-            self.resource_buttons[resource_type] = button_rect
+            dice_index = self.dice_result - 1
 
-            is_hover = button_rect.collidepoint(mouse_pos)
+        dice_rect = self.layout.dice
+        dice_img = self.scaled(('dice', dice_index), self.dice_images[dice_index], dice_rect.size)
+        self.screen.blit(dice_img, dice_rect.topleft)
 
-            if self.ui_images.get('option_h'):
-                option_img = self.ui_images['option_h']
-                option_img = pygame.transform.scale(option_img, (button_width, button_height))
-                self.screen.blit(option_img, (button_x, button_y))
+    def draw_resource_choice(self):
 
-                if is_hover:
-                    highlight = pygame.Surface((button_width, button_height), pygame.SRCALPHA)
-                    highlight.fill((255, 255, 255, 80))
-                    self.screen.blit(highlight, (button_x, button_y))
-                text_color = TEXT_COLOR
-            else:
-                if is_hover:
-                    pygame.draw.rect(self.screen, color, button_rect, border_radius=8)
-                    text_color = WHITE
-                else:
-                    pygame.draw.rect(self.screen, (240, 230, 200), button_rect, border_radius=8)
-                    pygame.draw.rect(self.screen, (101, 67, 33), button_rect, 3, border_radius=8)
-                    text_color = TEXT_COLOR
-
-            text = TEXT_FONT.render(label, True, text_color)
-            self.screen.blit(text, (button_x + button_width // 2 - text.get_width() // 2,
-                                   button_y + button_height // 2 - text.get_height() // 2))
+        for _, resource_type, _ in RESOURCE_CHOICES:
+            self.buttons[resource_type].draw(self.screen)
 
     def draw_event(self):
 
         if not self.current_event:
+            self.draw_background(self.screen)
             return
 
-        if self.current_event.gif_frames and len(self.current_event.gif_frames) > 0:
+        animation = self.event_animation()
+        if animation and animation.frames:
 
-            self.current_event.frame_counter += 1
-            if self.current_event.frame_counter >= self.current_event.frame_delay:
-                self.current_event.frame_counter = 0
-                self.current_event.current_frame = (self.current_event.current_frame + 1) % len(self.current_event.gif_frames)
+            frame_index = self.event_frame_index()
 
-            current_frame = self.current_event.gif_frames[self.current_event.current_frame]
-
-            current_frame_scaled = pygame.transform.scale(current_frame, (WINDOW_WIDTH, WINDOW_HEIGHT))
+            scaled_frames = self.scaled_event_frames(animation, self.layout.size)
+            current_frame_scaled = scaled_frames[frame_index] if scaled_frames is not None else None
+            if current_frame_scaled is None:
+                current_frame_scaled = pygame.transform.scale(animation.frame(frame_index), self.layout.size)
+            if current_frame_scaled.get_flags() & pygame.SRCALPHA:
+                self.draw_background(self.screen)
             self.screen.blit(current_frame_scaled, (0, 0))
-
-        top_height = int(WINDOW_HEIGHT * 0.4)
-        status_box_x = int(WINDOW_WIDTH * 0.05)
-        status_box_y = int(WINDOW_HEIGHT * 0.05)
-        status_box_width = int(WINDOW_WIDTH * 0.18)
-        status_box_height = top_height - int(WINDOW_HEIGHT * 0.05)
-
-        if self.ui_images.get('option_v'):
-            status_bg = self.ui_images['option_v']
-            status_bg = pygame.transform.scale(status_bg, (status_box_width, status_box_height))
-            self.screen.blit(status_bg, (status_box_x, status_box_y))
         else:
-            pygame.draw.rect(self.screen, (210, 180, 140), (status_box_x, status_box_y, status_box_width, status_box_height), border_radius=10)
-            pygame.draw.rect(self.screen, (101, 67, 33), (status_box_x, status_box_y, status_box_width, status_box_height), 3, border_radius=10)
+            self.draw_background(self.screen)
 
-        status_items = [
-            f"Round: {self.race.round}/{MAX_ROUNDS}",
-            f"Population: {self.race.population}",
-            f"Food: {self.race.food}",
-            f"Defense: {self.race.defense}",
-            f"Technology: {self.race.tech}"
-        ]
+        self.panels['status'].draw(self.screen)
+        self.draw_status(self.status)
 
-        total_text_height = 0
-        text_surfaces = []
-        for text in status_items:
-            surf = SMALL_FONT.render(text, True, TEXT_COLOR)
-            if surf.get_width() > status_box_width - int(status_box_width * 0.25):
-                surf = TINY_FONT.render(text, True, TEXT_COLOR)
-            text_surfaces.append(surf)
-            total_text_height += surf.get_height()
-
-        line_spacing = int(status_box_height * 0.05)
-        total_text_height += line_spacing * (len(status_items) - 1)
-
-        text_x = status_box_x + int(status_box_width * 0.22)
-        text_y = status_box_y + (status_box_height - total_text_height) // 2
-
-        for surf in text_surfaces:
-            self.screen.blit(surf, (text_x, text_y))
-            text_y += surf.get_height() + line_spacing
-
-        desc_box_width = int(WINDOW_WIDTH * 0.5)
-        desc_box_height = int(WINDOW_HEIGHT * 0.35)
-        desc_box_x = WINDOW_WIDTH // 2 - desc_box_width // 2
-        desc_box_y = WINDOW_HEIGHT // 2 - desc_box_height // 2
-
-        if self.ui_images.get('text_box'):
-            desc_bg = self.ui_images['text_box']
-            desc_bg = pygame.transform.scale(desc_bg, (desc_box_width, desc_box_height))
-            self.screen.blit(desc_bg, (desc_box_x, desc_box_y))
-        else:
-            pygame.draw.rect(self.screen, (240, 230, 200), (desc_box_x, desc_box_y, desc_box_width, desc_box_height), border_radius=10)
-            pygame.draw.rect(self.screen, (101, 67, 33), (desc_box_x, desc_box_y, desc_box_width, desc_box_height), 3, border_radius=10)
+        desc_box = self.layout.desc_box
+        self.panels['desc'].draw(self.screen)
 
-        event_title = EVENT_FONT.render(self.current_event.name, True, TEXT_COLOR)
+        event_title = self.render_text(EVENT_FONT, self.current_event.name, TEXT_COLOR)
 
         desc_lines = []
         if hasattr(self.current_event, 'description') and self.current_event.description:
@@ -720,81 +1123,45 @@ class Game:
         total_content_height += SMALL_FONT.get_height() + 10
         total_content_height += TEXT_FONT.get_height()
 
-        content_start_y = desc_box_y + (desc_box_height - total_content_height) // 2
-        current_y = content_start_y
+        current_y = desc_box.y + (desc_box.height - total_content_height) // 2
 
-        self.screen.blit(event_title, (desc_box_x + desc_box_width // 2 - event_title.get_width() // 2, current_y))
+        self.screen.blit(event_title, (desc_box.centerx - event_title.get_width() // 2, current_y))
         current_y += event_title.get_height() + 30
 
         for line in desc_lines:
-            desc_surf = SMALL_FONT.render(line, True, TEXT_COLOR)
-            self.screen.blit(desc_surf, (desc_box_x + desc_box_width // 2 - desc_surf.get_width() // 2, current_y))
+            desc_surf = self.render_text(SMALL_FONT, line, TEXT_COLOR)
+            self.screen.blit(desc_surf, (desc_box.centerx - desc_surf.get_width() // 2, current_y))
             current_y += 35
 
         current_y += 20
 
-        pop_surf = SMALL_FONT.render(pop_change_text, True, TEXT_COLOR)
-        self.screen.blit(pop_surf, (desc_box_x + desc_box_width // 2 - pop_surf.get_width() // 2, current_y))
+        pop_surf = self.render_text(SMALL_FONT, pop_change_text, TEXT_COLOR)
+        self.screen.blit(pop_surf, (desc_box.centerx - pop_surf.get_width() // 2, current_y))
         current_y += pop_surf.get_height() + 10
 
-        pop_surf2 = TEXT_FONT.render(pop_change_text2, True, RED if self.current_event.population_change < 0 else GREEN)
-        self.screen.blit(pop_surf2, (desc_box_x + desc_box_width // 2 - pop_surf2.get_width() // 2, current_y))
-
-        confirm_btn_width = int(WINDOW_WIDTH * 0.15)
-        confirm_btn_height = int(WINDOW_HEIGHT * 0.08)
-        confirm_btn_x = WINDOW_WIDTH // 2 - confirm_btn_width // 2
-        confirm_btn_y = desc_box_y + desc_box_height + int(WINDOW_HEIGHT * 0.05)
-
-        confirm_btn_rect = pygame.Rect(confirm_btn_x, confirm_btn_y, confirm_btn_width, confirm_btn_height)
-        mouse_pos = pygame.mouse.get_pos()
-        is_hover = confirm_btn_rect.collidepoint(mouse_pos)
-
-        if self.ui_images.get('option_h'):
-            confirm_bg = self.ui_images['option_h']
-            confirm_bg = pygame.transform.scale(confirm_bg, (confirm_btn_width, confirm_btn_height))
-            self.screen.blit(confirm_bg, (confirm_btn_x, confirm_btn_y))
-            if is_hover:
-                highlight = pygame.Surface((confirm_btn_width, confirm_btn_height), pygame.SRCALPHA)
-                highlight.fill((255, 255, 255, 80))
-                self.screen.blit(highlight, (confirm_btn_x, confirm_btn_y))
-        else:
-            pygame.draw.rect(self.screen, (240, 230, 200), confirm_btn_rect, border_radius=8)
-            pygame.draw.rect(self.screen, (101, 67, 33), confirm_btn_rect, 3, border_radius=8)
-
-        confirm_text = TEXT_FONT.render("Confirm", True, TEXT_COLOR)
-        self.screen.blit(confirm_text, (confirm_btn_x + confirm_btn_width // 2 - confirm_text.get_width() // 2,
-                                       confirm_btn_y + confirm_btn_height // 2 - confirm_text.get_height() // 2))
+        pop_surf2 = self.render_text(TEXT_FONT, pop_change_text2, RED if self.current_event.population_change < 0 else GREEN)
+        self.screen.blit(pop_surf2, (desc_box.centerx - pop_surf2.get_width() // 2, current_y))
 
-        self.confirm_button_rect = confirm_btn_rect
+        self.buttons['confirm'].draw(self.screen)
 
-    def draw_ending_screen(self):
+    def draw_ending_chrome(self, target):
 
         if not self.ending_type:
             return
 
-        ending_img = self.ending_images.get(self.ending_type)
+        ending_img = self.ending_image(self.ending_type)
         if ending_img:
 
-            ending_img_scaled = pygame.transform.scale(ending_img, (WINDOW_WIDTH, WINDOW_HEIGHT))
-            self.screen.blit(ending_img_scaled, (0, 0))
-
-        left_box_width = int(WINDOW_WIDTH * 0.45)
-        left_box_height = int(WINDOW_HEIGHT * 0.5)
-        left_box_x = int(WINDOW_WIDTH * 0.08)
-        left_box_y = WINDOW_HEIGHT // 2 - left_box_height // 2
+            ending_img_scaled = self.scaled(('ending', self.ending_type), ending_img, self.layout.size)
+            target.blit(ending_img_scaled, (0, 0))
 
-        if self.ui_images.get('text_box'):
-            left_bg = self.ui_images['text_box']
-            left_bg = pygame.transform.scale(left_bg, (left_box_width, left_box_height))
-            self.screen.blit(left_bg, (left_box_x, left_box_y))
-        else:
-            pygame.draw.rect(self.screen, (240, 230, 200), (left_box_x, left_box_y, left_box_width, left_box_height), border_radius=10)
-            pygame.draw.rect(self.screen, (101, 67, 33), (left_box_x, left_box_y, left_box_width, left_box_height), 3, border_radius=10)
+        ending_box = self.layout.ending_box
+        self.panels['ending'].draw(target)
 
-        ending_title = EVENT_FONT.render(self.ending_type, True, TEXT_COLOR)
-        title_x = left_box_x + left_box_width // 2 - ending_title.get_width() // 2
-        title_y = left_box_y + int(left_box_height * 0.15)
-        self.screen.blit(ending_title, (title_x, title_y))
+        ending_title = self.render_text(EVENT_FONT, self.ending_type, TEXT_COLOR)
+        title_x = ending_box.centerx - ending_title.get_width() // 2
+        title_y = ending_box.y + int(ending_box.height * 0.15)
+        target.blit(ending_title, (title_x, title_y))
 
         desc_y = title_y + ending_title.get_height() + 40
         ending_descriptions = {
@@ -867,82 +1234,24 @@ class Game:
         desc_lines = ending_descriptions.get(self.ending_type, ["Game Over", "", "Your journey has ended."])
         for line in desc_lines:
             if line:
-                desc_surf = SMALL_FONT.render(line, True, TEXT_COLOR)
-                desc_x = left_box_x + left_box_width // 2 - desc_surf.get_width() // 2
-                self.screen.blit(desc_surf, (desc_x, desc_y))
+                desc_surf = self.render_text(SMALL_FONT, line, TEXT_COLOR)
+                desc_x = ending_box.centerx - desc_surf.get_width() // 2
+                target.blit(desc_surf, (desc_x, desc_y))
             desc_y += 35
 
-        right_box_width = int(WINDOW_WIDTH * 0.25)
-        right_box_height = left_box_height
-        right_box_x = left_box_x + left_box_width + int(WINDOW_WIDTH * 0.05)
-        right_box_y = left_box_y
-
-        if self.ui_images.get('option_v'):
-            right_bg = self.ui_images['option_v']
-            right_bg = pygame.transform.scale(right_bg, (right_box_width, right_box_height))
-            self.screen.blit(right_bg, (right_box_x, right_box_y))
-        else:
-            pygame.draw.rect(self.screen, (210, 180, 140), (right_box_x, right_box_y, right_box_width, right_box_height), border_radius=10)
-            pygame.draw.rect(self.screen, (101, 67, 33), (right_box_x, right_box_y, right_box_width, right_box_height), 3, border_radius=10)
-
-        final_stats = [
-            f"Round: {self.race.round}/{MAX_ROUNDS}",
-            f"Population: {self.race.population}",
-            f"Food: {self.race.food}",
-            f"Defense: {self.race.defense}",
-            f"Technology: {self.race.tech}"
-        ]
-
-        total_text_height = 0
-        text_surfaces = []
-        for text in final_stats:
-            surf = SMALL_FONT.render(text, True, TEXT_COLOR)
-            if surf.get_width() > right_box_width - int(right_box_width * 0.25):
-                surf = TINY_FONT.render(text, True, TEXT_COLOR)
-            text_surfaces.append(surf)
-            total_text_height += surf.get_height()
-
-        line_spacing = int(right_box_height * 0.05)
-        total_text_height += line_spacing * (len(final_stats) - 1)
-
-        text_x = right_box_x + int(right_box_width * 0.15)
-        text_y = right_box_y + (right_box_height - total_text_height) // 2
-
-        for surf in text_surfaces:
-            self.screen.blit(surf, (text_x, text_y))
-            text_y += surf.get_height() + line_spacing
+        self.panels['final_stats'].draw(target)
 
-        restart_btn_width = right_box_width
-        restart_btn_height = int(WINDOW_HEIGHT * 0.1)
-        restart_btn_x = right_box_x
-        restart_btn_y = right_box_y + right_box_height + int(WINDOW_HEIGHT * 0.03)
-
-        restart_button_rect = pygame.Rect(restart_btn_x, restart_btn_y, restart_btn_width, restart_btn_height)
-
-        self.restart_button_rect = restart_button_rect
-
-        mouse_pos = pygame.mouse.get_pos()
-        is_hover = restart_button_rect.collidepoint(mouse_pos)
+    def draw_ending_screen(self):
 
-        if self.ui_images.get('option_h'):
-            restart_bg = self.ui_images['option_h']
-            restart_bg = pygame.transform.scale(restart_bg, (restart_btn_width, restart_btn_height))
-            self.screen.blit(restart_bg, (restart_btn_x, restart_btn_y))
-            if is_hover:
-                highlight = pygame.Surface((restart_btn_width, restart_btn_height), pygame.SRCALPHA)
-                highlight.fill((255, 255, 255, 80))
-                self.screen.blit(highlight, (restart_btn_x, restart_btn_y))
-        else:
-            pygame.draw.rect(self.screen, (240, 230, 200), restart_button_rect, border_radius=8)
-            pygame.draw.rect(self.screen, (101, 67, 33), restart_button_rect, 3, border_radius=8)
+        if not self.ending_type:
+            return
 
-        restart_text = TEXT_FONT.render("Restart", True, TEXT_COLOR)
-        self.screen.blit(restart_text, (restart_btn_x + restart_btn_width // 2 - restart_text.get_width() // 2,
-                                       restart_btn_y + restart_btn_height // 2 - restart_text.get_height() // 2))
+        self.draw_status(self.final_stats)
+        self.buttons['restart'].draw(self.screen)
 
     def reset_game(self):
 
-        self.race = Race()
+        self.engine.reset()
         self.game_over = False
         self.game_started = False
         self.state = "START"
@@ -951,66 +1260,151 @@ class Game:
         self.dice_result = 1
         self.resource_points = 0
         self.current_event = None
-        self.event_log = []
         self.ending_type = None
-        if hasattr(self, 'dice_rect'):
-            delattr(self, 'dice_rect')
+
+    def snapshot(self):
+
+        # A crash mid-roll resumes at the choice the roll was leading to
+        state = "RESOURCE_CHOICE" if self.state == "DICE" else self.state
+        event = self.random_events.index(self.current_event) if state == "EVENT" else None
+        race_state = PackedState.from_race(self.race, self.dice_result, event)
+        return Snapshot(state, race_state, self.engine.moves, self.engine.seed)
+
+    def autosave(self):
+
+        # Called on every state change; the write itself happens on the autosave thread
+        self.saved_state = self.state
+        if not self.autosaver:
+            return
+        if self.state in SAVED_STATES or self.state == "DICE":
+            # A game that cannot be packed is not worth ending the main loop over
+            try:
+                self.autosaver.save(self.snapshot().encode())
+            except (OverflowError, ValueError) as e:
+                print(f"Autosave skipped: {e}")
+        else:
+            self.autosaver.clear()
+
+    def resume_autosave(self):
+
+        if not self.autosaver or not os.path.exists(AUTOSAVE_PATH):
+            return
+
+        started = time.perf_counter()
+        try:
+            snapshot = Snapshot.load(AUTOSAVE_PATH)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring autosave {AUTOSAVE_PATH}: {e}")
+            return
+        if snapshot.rules_digest != RULES.digest:
+            print(f"Ignoring autosave {AUTOSAVE_PATH}: saved under different rules")
+            return
+
+        race_state = snapshot.race_state
+        self.engine.resume(race_state.to_race(), snapshot.moves, snapshot.seed,
+                           rolled=snapshot.state == "RESOURCE_CHOICE")
+        self.game_started = True
+        self.state = snapshot.state
+        self.dice_result = race_state.dice or 1
+        self.resource_points = race_state.dice
+
+        if snapshot.state == "EVENT":
+            # The animation restarts; its frames are requested by the first draw, not waited for here
+            self.current_event = self.engine.current_event = self.random_events[race_state.event]
+            self.event_started_at = ticks_ms()
+
+        self.saved_state = self.state
+        print(f"Resumed round {self.race.round} ({self.state}) from {AUTOSAVE_PATH} in "
+              f"{(time.perf_counter() - started) * 1000:.2f}ms")
+
+    def wait_for_events(self):
+
+        # Static screens block on input; an event GIF only wakes the loop when its frame changes
+        timeout = IDLE_WAIT_MS
+        animation = self.event_animation() if self.state == "EVENT" else None
+        if animation:
+            elapsed = ticks_ms() - self.event_started_at
+            next_frame = animation.ms_until_next_frame(elapsed)
+            if next_frame is not None:
+                timeout = max(1, min(timeout, next_frame))
+        if self.profiler.enabled:
+            timeout = min(timeout, PROFILE_REFRESH_MS)
+
+        event = pygame.event.wait(timeout)
+
+        # Still cap bursts of input (mouse motion) at the regular frame rate
+        self.clock.tick(FPS)
+        if event.type == pygame.NOEVENT:
+            return pygame.event.get()
+        return [event] + pygame.event.get()
 
     def run(self):
 
         running = True
         while running:
-            self.clock.tick(FPS)
 
+            self.profiler.begin()
             if self.state == "DICE":
+                self.clock.tick(FPS)
+                self.profiler.mark('wait')
                 self.update_dice_animation()
+                self.profiler.mark('update')
+                events = pygame.event.get()
+            else:
+                events = self.wait_for_events()
+                self.profiler.mark('wait')
 
-            for event in pygame.event.get():
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
 
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+                    self.request_full_redraw()
+
+                # Only a resizable window follows the user's resizing; fullscreen keeps its mode
+                if event.type == pygame.VIDEORESIZE and WINDOWED:
+                    self.resize(event.w, event.h)
+
                 if event.type == pygame.KEYDOWN:
 
                     if event.key == pygame.K_ESCAPE:
                         running = False
 
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_pos = pygame.mouse.get_pos()
-
-                    if self.state == "START":
-
-                        if hasattr(self, 'start_button_rect') and self.start_button_rect.collidepoint(mouse_pos):
-                            self.start_game()
-
-                    elif self.state == "DICE_READY":
-                        # Click dice to start rolling
-                        if hasattr(self, 'dice_rect') and self.dice_rect.collidepoint(mouse_pos):
-                            self.state = "DICE"
-                            self.start_dice_animation()
+                    if event.key == pygame.K_F3:
+                        self.profiler.toggle()
+                        self.request_full_redraw()
 
-                    elif self.state == "RESOURCE_CHOICE":
+                # The current screen's widgets handle both; a click may switch to another screen
+                if event.type == pygame.MOUSEMOTION:
+                    self.widgets().update_hover(event.pos)
 
-                        if hasattr(self, 'resource_buttons'):
-                            for resource_type, button_rect in self.resource_buttons.items():
-                                if button_rect.collidepoint(mouse_pos):
-                                    self.allocate_resource(resource_type)
-                                    break
-
-                    elif self.state == "EVENT":
-
-                        if hasattr(self, 'confirm_button_rect') and self.confirm_button_rect.collidepoint(mouse_pos):
-                            self.next_round()
-
-                    elif self.state == "GAME_OVER":
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    self.widgets().click(event.pos)
 
-                        if hasattr(self, 'restart_button_rect') and self.restart_button_rect.collidepoint(mouse_pos):
-                            self.reset_game()
+            if self.state != self.saved_state:
+                self.autosave()
 
+            self.profiler.mark('events')
             self.draw()
-
+            self.profiler.end()
+            STARTUP.first_frame()
+
+        self.profiler.dump(PROFILE_PATH)
+        if self.autosaver:
+            self.autosaver.close()
+        self.event_log.close()
+        self.shutdown()
         pygame.quit()
         sys.exit()
 
+    def shutdown(self):
+
+        # Background loads and pre-scaling call into pygame, so they have to stop before pygame.quit()
+        self.closing = True
+        self.assets.shutdown()
+        for job in list(self.event_scale_jobs.values()):
+            job.join()
+
 if __name__ == "__main__":
     game = Game()
     game.run()
@@ -0,0 +1,138 @@
+import json
+import time
+from bisect import bisect_right
+from collections import deque
+
+import pygame
+
+from stats import percentile
+
+STAGES = ('wait', 'update', 'events', 'draw', 'overlay', 'present')
+WORK_STAGES = STAGES[1:]  # Everything except blocking for input, which is idle time rather than cost
+HISTORY_FRAMES = 600  # Rolling window behind the overlay and the percentiles
+HISTOGRAM_BOUNDS_MS = (0.25, 0.5, 1, 2, 4, 8, 16.7, 33.3, 66.7)  # Bucket upper bounds; the last bucket is open
+
+GRAPH_FRAMES = 180
+GRAPH_HEIGHT = 60
+GRAPH_SCALE_MS = 33.3  # Frame time at the top of the graph
+FRAME_BUDGET_MS = 1000 / 60
+
+class FrameProfiler:
+
+    # Splits each pass of Game.run into stages with mark(); every call is a no-op while disabled
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.frames = 0
+        self.history = {stage: deque(maxlen=HISTORY_FRAMES) for stage in STAGES + ('work',)}
+        self.histograms = {stage: [0] * (len(HISTOGRAM_BOUNDS_MS) + 1) for stage in STAGES + ('work',)}
+        self.current = dict.fromkeys(STAGES, 0.0)
+        self.last_mark = None
+        self.font = None
+
+    def toggle(self):
+
+        self.enabled = not self.enabled
+        self.last_mark = None
+
+    def begin(self):
+
+        if not self.enabled:
+            return
+        self.last_mark = time.perf_counter()
+
+    def mark(self, stage):
+
+        # Charges the time since the previous mark to stage
+        if not self.enabled or self.last_mark is None:
+            return
+        now = time.perf_counter()
+        self.current[stage] += (now - self.last_mark) * 1000
+        self.last_mark = now
+
+    def end(self):
+
+        if not self.enabled or self.last_mark is None:
+            return
+
+        current = self.current
+        current['work'] = sum(current[stage] for stage in WORK_STAGES)
+        for stage, ms in current.items():
+            self.history[stage].append(ms)
+            self.histograms[stage][bisect_right(HISTOGRAM_BOUNDS_MS, ms)] += 1
+        self.frames += 1
+        self.current = dict.fromkeys(STAGES, 0.0)
+        self.last_mark = None
+
+    def summary(self):
+
+        stats = {}
+        for stage, samples in self.history.items():
+            ordered = sorted(samples)
+            stats[stage] = {
+                'mean': sum(ordered) / len(ordered) if ordered else 0.0,
+                'p50': percentile(ordered, 0.50),
+                'p90': percentile(ordered, 0.90),
+                'p99': percentile(ordered, 0.99),
+                'max': ordered[-1] if ordered else 0.0,
+            }
+        return stats
+
+    def overlay_rect(self, surface):
+
+        return pygame.Rect(10, 10, min(surface.get_width() - 20, GRAPH_FRAMES * 2 + 20), GRAPH_HEIGHT + 165)
+
+    def draw_overlay(self, surface):
+
+        if self.font is None:
+            self.font = pygame.font.Font(None, 18)
+
+        rect = self.overlay_rect(surface)
+        panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 190))
+
+        # Work time per frame, newest on the right, with the 60 FPS budget as a line
+        graph_bottom = GRAPH_HEIGHT + 10
+        samples = list(self.history['work'])[-GRAPH_FRAMES:]
+        x = rect.width - 10 - 2 * len(samples)
+        for ms in samples:
+            height = max(1, min(GRAPH_HEIGHT, int(ms / GRAPH_SCALE_MS * GRAPH_HEIGHT)))
+            color = (90, 220, 90) if ms <= FRAME_BUDGET_MS else (240, 80, 60)
+            pygame.draw.line(panel, color, (x, graph_bottom), (x, graph_bottom - height))
+            x += 2
+        budget_y = graph_bottom - int(FRAME_BUDGET_MS / GRAPH_SCALE_MS * GRAPH_HEIGHT)
+        pygame.draw.line(panel, (220, 200, 50), (10, budget_y), (rect.width - 10, budget_y))
+
+        # The default font is proportional, so every cell gets its own column
+        y = graph_bottom + 6
+        stats = self.summary()
+        rows = [('ms', 'p50', 'p99', 'max')]
+        rows += [(stage,) + tuple(f"{stats[stage][key]:.2f}" for key in ('p50', 'p99', 'max'))
+                 for stage in ('work',) + STAGES]
+        for row in rows:
+            for column, cell in enumerate(row):
+                text = self.font.render(cell, True, (230, 230, 230))
+                x = 10 if column == 0 else 80 + column * 80 - text.get_width()
+                panel.blit(text, (x, y))
+            y += 17
+
+        surface.blit(panel, rect.topleft)
+        self.mark('overlay')
+        return rect
+
+    def dump(self, path):
+
+        if not self.frames:
+            return
+        profile = {
+            'frames': self.frames,
+            'histogram_bounds_ms': HISTOGRAM_BOUNDS_MS,
+            'histograms': self.histograms,
+            'recent': self.summary(),
+            'recent_frames': {stage: list(samples) for stage, samples in self.history.items()},
+        }
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(profile, f, indent=2)
+            print(f"Frame profile of {self.frames} frames written to {path}")
+        except OSError as e:
+            print(f"Failed to write frame profile {path}: {e}")
@@ -0,0 +1,285 @@
+import argparse
+import glob
+import os
+import random
+import struct
+import time
+
+from rules import DICE_SIDES, MAX_EVENTS, RESOURCE_TYPES, RULES, Engine
+
+REPLAY_MAGIC = b'NVRP'
+REPLAY_VERSION = 1
+HEADER = struct.Struct('<4sBBBQIB')  # magic, version, flags, round count, seed, rules digest, ending name length
+REPLAY_SUFFIX = '.nvr'
+
+FLAG_SEEDED = 1  # The seed field is meaningful; scripted or custom rngs leave it unset
+
+# One byte per round: dice - 1 in bits 0-2, resource index in bits 3-4, event index in bits 5-7
+CHOICE_SHIFT = 3
+EVENT_SHIFT = 5
+
+# Playback pacing at speed 1, in milliseconds
+START_PAUSE_MS = 1000
+CHOICE_PAUSE_MS = 800
+EVENT_PAUSE_MS = 2000
+ENDING_PAUSE_MS = 3000
+
+class ReplayMismatch(ValueError):
+    pass  # The recorded rounds cannot be played under the current rules
+
+class Replay:
+
+    def __init__(self, moves, ending, seed=None, rules_digest=None):
+        self.moves = list(moves)  # (dice, resource index, event index) per round
+        self.ending = ending
+        self.seed = seed
+        self.rules_digest = RULES.digest if rules_digest is None else rules_digest
+
+    @classmethod
+    def from_engine(cls, engine):
+
+        return cls(engine.moves, engine.ending, engine.seed)
+
+    def encode(self):
+
+        name = self.ending.encode('ascii')
+        if len(name) > 255:
+            raise ValueError(f"Ending name {self.ending!r} is too long for a replay")
+        flags = FLAG_SEEDED if self.seed is not None else 0
+        data = bytearray(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, flags, len(self.moves), self.seed or 0,
+                                     self.rules_digest, len(name)))
+        data += name
+        data += encode_moves(self.moves)
+        return bytes(data)
+
+    @classmethod
+    def decode(cls, data):
+
+        if len(data) < HEADER.size:
+            raise ValueError("Replay is truncated")
+        magic, version, flags, rounds, seed, digest, name_length = HEADER.unpack_from(data, 0)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError("Not a replay file of this version")
+
+        offset = HEADER.size
+        if len(data) != offset + name_length + rounds:
+            raise ValueError("Replay is truncated")
+        ending = bytes(data[offset:offset + name_length]).decode('ascii')
+        offset += name_length
+
+        return cls(decode_moves(data[offset:]), ending, seed if flags & FLAG_SEEDED else None, digest)
+
+    def save(self, directory):
+
+        # Timestamped names keep a directory of replays in play order
+        os.makedirs(directory, exist_ok=True)
+        tag = f"{self.seed:016x}" if self.seed is not None else "unseeded"
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{tag}{REPLAY_SUFFIX}")
+        with open(path, 'wb') as f:
+            f.write(self.encode())
+        return path
+
+    @classmethod
+    def load(cls, path):
+
+        with open(path, 'rb') as f:
+            return cls.decode(f.read())
+
+def encode_moves(moves):
+
+    data = bytearray()
+    for dice, choice, event in moves:
+        if not 1 <= dice <= DICE_SIDES or event >= MAX_EVENTS:
+            raise ValueError(f"Round ({dice}, {choice}, {event}) does not fit in one byte")
+        data.append(dice - 1 | choice << CHOICE_SHIFT | event << EVENT_SHIFT)
+    return bytes(data)
+
+def decode_moves(data):
+
+    moves = [((byte & 7) + 1, byte >> CHOICE_SHIFT & 3, byte >> EVENT_SHIFT) for byte in data]
+    for dice, choice, event in moves:
+        if dice > DICE_SIDES or choice >= len(RESOURCE_TYPES):
+            raise ValueError(f"Round ({dice}, {choice}, {event}) is not a valid move")
+    return moves
+
+class ScriptedRandom:
+
+    # Stands in for the engine's rng, handing back the recorded dice and events in order
+    def __init__(self, moves):
+        self.dice = iter([dice for dice, choice, event in moves])
+        self.events = iter([event for dice, choice, event in moves])
+
+    def randint(self, a, b):
+
+        dice = next(self.dice, None)
+        if dice is None:
+            raise ReplayMismatch("replay has fewer rounds than the game now lasts")
+        return dice
+
+    def choice(self, seq):
+
+        event = next(self.events, None)
+        if event is None:
+            raise ReplayMismatch("replay has fewer rounds than the game now lasts")
+        if event >= len(seq):
+            raise ReplayMismatch(f"event {event} no longer exists")
+        return seq[event]
+
+def recorded_strategy(replay):
+
+    choices = iter([RESOURCE_TYPES[choice] for dice, choice, event in replay.moves])
+
+    def strategy(race, points):
+
+        choice = next(choices, None)
+        if choice is None:
+            raise ReplayMismatch("replay has fewer rounds than the game now lasts")
+        return choice
+
+    return strategy
+
+def resimulate(replay, events=None):
+
+    # Recorded dice and events under the current rules; returns the ending they lead to now
+    engine = Engine(rng=ScriptedRandom(replay.moves), events=events)
+    return engine.play(recorded_strategy(replay))
+
+def verify(replay):
+
+    # Returns a list of problems, empty when the replay still reproduces exactly
+    problems = []
+    if replay.rules_digest != RULES.digest:
+        problems.append("recorded under different rules")
+
+    try:
+        ending = resimulate(replay)
+        if ending != replay.ending:
+            problems.append(f"ending {replay.ending} now gives {ending}")
+    except ReplayMismatch as e:
+        problems.append(str(e))
+
+    if replay.seed is not None:
+        engine = Engine(rng=random.Random(replay.seed))
+        try:
+            engine.play(recorded_strategy(replay))
+            reproduced = engine.moves == replay.moves
+        except ReplayMismatch:
+            reproduced = False
+        if not reproduced:
+            problems.append("seed no longer reproduces the recorded dice and events")
+    return problems
+
+def replay_paths(paths):
+
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, f"*{REPLAY_SUFFIX}")))
+        else:
+            yield path
+
+def check(paths):
+
+    started = time.perf_counter()
+    checked = failed = 0
+    for path in replay_paths(paths):
+        checked += 1
+        try:
+            problems = verify(Replay.load(path))
+        except (OSError, ValueError) as e:
+            problems = [str(e)]
+        if problems:
+            failed += 1
+            print(f"{path}: {'; '.join(problems)}")
+
+    elapsed = time.perf_counter() - started
+    print(f"{checked} replays checked in {elapsed:.3f}s, {failed} differ")
+    return failed == 0
+
+def show(replay):
+
+    seed = replay.seed if replay.seed is not None else "none"
+    print(f"Seed {seed}, rules {replay.rules_digest:08x}, ending {replay.ending}")
+    events = RULES.create_random_events()
+    for round_number, (dice, choice, event) in enumerate(replay.moves, 1):
+        name = events[event].name if event < len(events) else f"event #{event}"
+        print(f"  Round {round_number}: rolled {dice}, {RESOURCE_TYPES[choice]}, {name}")
+
+def play(replay, speed=1.0):
+
+    # Drives a real Game through the recorded session; pygame is only needed here
+    os.environ['NVWA_AUTOSAVE'] = ''
+    os.environ['NVWA_EVENT_LOG'] = ''
+    import pygame
+    from main import FPS, Game, ticks_ms
+
+    game = Game()
+    game.replay_dir = None
+    game.engine = Engine(rng=ScriptedRandom(replay.moves), events=game.random_events)
+    choices = [RESOURCE_TYPES[choice] for dice, choice, event in replay.moves]
+
+    def frame():
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                raise KeyboardInterrupt
+        game.draw()
+        game.clock.tick(FPS)
+
+    def pause(ms):
+
+        deadline = ticks_ms() + ms / speed
+        while ticks_ms() < deadline:
+            frame()
+
+    try:
+        pause(START_PAUSE_MS)
+        game.start_game()
+        for choice in choices:
+            game.state = "DICE"
+            game.start_dice_animation()
+            while game.dice_animating:
+                # Faster playback skips animation frames instead of raising the frame rate
+                for _ in range(max(1, int(speed))):
+                    game.update_dice_animation()
+                frame()
+            pause(CHOICE_PAUSE_MS)
+            game.allocate_resource(choice)
+            pause(EVENT_PAUSE_MS)
+            game.next_round()
+        pause(ENDING_PAUSE_MS)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        game.shutdown()
+        pygame.quit()
+
+    return game.ending_type
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Inspect, verify and play back recorded games")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    check_parser = commands.add_parser('check', help="re-simulate replays under the current rules")
+    check_parser.add_argument('paths', nargs='+', help="replay files or directories of them")
+
+    show_parser = commands.add_parser('show', help="print the rounds of a replay")
+    show_parser.add_argument('path')
+
+    play_parser = commands.add_parser('play', help="play a replay back on screen")
+    play_parser.add_argument('path')
+    play_parser.add_argument('--speed', type=float, default=1.0)
+
+    args = parser.parse_args()
+    if args.command == 'check':
+        raise SystemExit(0 if check(args.paths) else 1)
+    try:
+        if args.command == 'show':
+            show(Replay.load(args.path))
+        else:
+            print(f"Ending: {play(Replay.load(args.path), args.speed)}")
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"{args.path}: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import json
+import os
+import random
+import zlib
+from itertools import product
+
+MAX_ROUNDS = 5
+DICE_SIDES = 6
+RESOURCE_TYPES = ("food", "defense", "tech")
+MAX_EVENTS = 7  # Replays, autosaves and packed states keep an event index in 3 bits, with one value for none
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules.json')
+CONDITION_FIELDS = ('population', 'food', 'defense', 'tech')  # Axes of the compiled ending table
+
+class Race:
+
+    __slots__ = ('population', 'food', 'defense', 'tech', 'round')
+
+    def __init__(self):
+        self.population = 5
+        self.food = 0
+        self.defense = 0
+        self.tech = 0
+        self.round = 1
+
+    def is_alive(self):
+        return self.population > 0
+
+class RandomEvent:
+
+    def __init__(self, name, animation_key, population_change, description=""):
+        self.name = name
+        self.animation_key = animation_key
+        self.population_change = population_change
+        self.description = description
+
+class RuleSet:
+
+    def __init__(self, data):
+        # Identifies the rules a replay was recorded under
+        self.digest = zlib.crc32(json.dumps(data, sort_keys=True).encode())
+        self.event_specs = data['events']
+        if len(self.event_specs) > MAX_EVENTS:
+            raise ValueError(f"Rules define {len(self.event_specs)} events, at most {MAX_EVENTS} are supported")
+        rules = data['endings']
+        default = data['default_ending']
+
+        for rule in rules:
+            unknown = set(rule) - {'name', *CONDITION_FIELDS}
+            if unknown:
+                raise ValueError(f"Ending {rule.get('name')!r} has unknown conditions {sorted(unknown)}")
+
+        self.endings = tuple(dict.fromkeys([rule['name'] for rule in rules] + [default]))
+        self.caps = tuple(threshold_cap(rules, field) for field in CONDITION_FIELDS)
+        self.shape = tuple(cap + 1 for cap in self.caps)
+        self.strides = (self.shape[1] * self.shape[2] * self.shape[3], self.shape[2] * self.shape[3], self.shape[3], 1)
+        self.table = self.compile(rules, default)
+
+    def compile(self, rules, default):
+
+        # Bit i of a column entry is set when ending rule i accepts that value of the field
+        columns = []
+        for field, cap in zip(CONDITION_FIELDS, self.caps):
+            columns.append([sum(1 << i for i, rule in enumerate(rules) if accepts(rule, field, value))
+                            for value in range(cap + 1)])
+
+        results = [self.endings.index(rule['name']) for rule in rules]
+        default_index = self.endings.index(default)
+
+        # The lowest set bit is the first rule that matches, like the order of an if-chain
+        table = bytearray()
+        for population, food, defense, tech in product(*columns):
+            matched = population & food & defense & tech
+            table.append(results[(matched & -matched).bit_length() - 1] if matched else default_index)
+        return bytes(table)
+
+    def ending_index(self, population, food, defense, tech):
+
+        caps = self.caps
+        strides = self.strides
+        return self.table[min(population, caps[0]) * strides[0] + min(food, caps[1]) * strides[1]
+                          + min(defense, caps[2]) * strides[2] + min(tech, caps[3])]
+
+    def determine_ending(self, race):
+
+        return self.endings[self.ending_index(race.population, race.food, race.defense, race.tech)]
+
+    def create_random_events(self):
+
+        return [RandomEvent(spec['name'], spec['animation'], spec['population_change'], spec.get('description', ""))
+                for spec in self.event_specs]
+
+def accepts(rule, field, value):
+
+    # Bounds are inclusive [min, max]; null or a missing field means unbounded
+    low, high = rule.get(field, (None, None))
+    return (low is None or value >= low) and (high is None or value <= high)
+
+def threshold_cap(rules, field):
+
+    # Past the largest bound any rule checks, every value of the field classifies the same way
+    cap = 0
+    for rule in rules:
+        low, high = rule.get(field, (None, None))
+        if low is not None:
+            cap = max(cap, low)
+        if high is not None:
+            cap = max(cap, high + 1)
+    return cap
+
+def load_rules(path=RULES_PATH):
+
+    with open(path, encoding='utf-8') as f:
+        return RuleSet(json.load(f))
+
+RULES = load_rules()
+ENDINGS = RULES.endings
+
+def create_random_events():
+
+    return RULES.create_random_events()
+
+def determine_ending(race):
+
+    return RULES.determine_ending(race)
+
+class Engine:
+
+    def __init__(self, rng=None, events=None, seed=None):
+        # Anything with randint() and choice() works. Without one, every game draws its own seed from
+        # random.Random(seed), so each game can be reproduced from that seed alone
+        self.fixed_rng = rng
+        self.seeds = random.Random(seed)
+        self.events = events if events is not None else create_random_events()
+        self.reset()
+
+    def reset(self):
+
+        self.race = Race()
+        self.current_event = None
+        self.ending = None
+
+        # (dice, resource index, event index) per round, everything a replay needs
+        self.moves = []
+        self.points = None
+        self.choice = None
+
+        if self.fixed_rng is not None:
+            self.seed = None
+            self.rng = self.fixed_rng
+        else:
+            self.seed = self.seeds.getrandbits(63)
+            self.rng = random.Random(self.seed)
+
+    def resume(self, race, moves, seed=None, rolled=False):
+
+        # Rebuilds a game in progress; a seeded rng is advanced past every draw the recorded rounds made
+        self.reset()
+        self.race = race
+        self.moves = list(moves)
+        if seed is not None and self.fixed_rng is None:
+            self.seed = seed
+            self.rng = random.Random(seed)
+            for _ in self.moves:
+                self.rng.randint(1, DICE_SIDES)
+                self.rng.choice(self.events)
+            if rolled:
+                self.rng.randint(1, DICE_SIDES)
+
+    def roll_dice(self):
+
+        return self.rng.randint(1, DICE_SIDES)
+
+    def allocate_resource(self, resource_type, points):
+
+        self.points = points
+        self.choice = RESOURCE_TYPES.index(resource_type)
+
+        if resource_type == "food":
+            self.race.food += points
+        elif resource_type == "defense":
+            self.race.defense += points
+        elif resource_type == "tech":
+            self.race.tech += points
+
+    def trigger_random_event(self):
+
+        self.current_event = self.rng.choice(self.events)
+
+        self.race.population += self.current_event.population_change
+
+        if self.race.population < 0:
+            self.race.population = 0
+
+        if self.choice is not None:
+            self.moves.append((self.points, self.choice, self.events.index(self.current_event)))
+            self.points = self.choice = None
+
+        return self.current_event
+
+    def next_round(self):
+
+        # Returns True once the game is over and the ending has been decided
+        if self.race.is_alive():
+            self.race.round += 1
+            if self.race.round <= MAX_ROUNDS:
+                return False
+
+        self.ending = determine_ending(self.race)
+        return True
+
+    def play(self, strategy):
+
+        # Runs a whole game headlessly; strategy(race, points) returns a resource type
+        self.reset()
+        while True:
+            points = self.roll_dice()
+            self.allocate_resource(strategy(self.race, points), points)
+            self.trigger_random_event()
+            if self.next_round():
+                return self.ending
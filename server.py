@@ -0,0 +1,475 @@
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from bisect import bisect_right
+from collections import Counter, deque
+
+from rules import DICE_SIDES, MAX_ROUNDS, RESOURCE_TYPES, create_random_events
+from state import PackedState
+from stats import percentile, traced_bytes
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_SESSIONS = 100_000
+WRITE_HIGH_WATER = 64 * 1024  # Buffered response bytes before a connection waits for the client to read
+LATENCY_BOUNDS_US = (10, 25, 50, 100, 250, 500, 1000, 2500, 10000)  # Bucket upper bounds; the last bucket is open
+LATENCY_WINDOW = 10_000  # Recent requests behind the percentiles
+
+# The Game.run screens; the dice animation is a client concern, so a roll goes straight to the choice
+PHASES = ("START", "DICE_READY", "RESOURCE_CHOICE", "EVENT", "GAME_OVER")
+START, DICE_READY, RESOURCE_CHOICE, EVENT, GAME_OVER = range(len(PHASES))
+
+EVENTS = create_random_events()
+INITIAL_STATE = PackedState.initial()
+
+MASK64 = (1 << 64) - 1
+
+def splitmix64(state):
+
+    # Returns the next generator state and its output; a whole rng in one int instead of random.Random's 2.5KB
+    state = (state + 0x9E3779B97F4A7C15) & MASK64
+    z = state
+    z = (z ^ z >> 30) * 0xBF58476D1CE4E5B9 & MASK64
+    z = (z ^ z >> 27) * 0x94D049BB133111EB & MASK64
+    return state, z ^ z >> 31
+
+class Session:
+
+    # A whole game in three small ints; sessions are plain objects driven by the connection's coroutine
+    __slots__ = ('phase', 'state', 'rng')
+
+    def __init__(self, seed):
+        self.phase = START
+        self.state = INITIAL_STATE
+        self.rng = seed & MASK64
+
+    def draw(self, choices):
+
+        self.rng, value = splitmix64(self.rng)
+        return value % choices
+
+    def expect(self, phase):
+
+        if self.phase != phase:
+            raise ValueError(f"Not allowed in {PHASES[self.phase]}")
+
+    def start(self):
+
+        self.expect(START)
+        self.state = INITIAL_STATE
+        self.phase = DICE_READY
+
+    def roll(self):
+
+        self.expect(DICE_READY)
+        self.state = self.state.roll(self.draw(DICE_SIDES) + 1)
+        self.phase = RESOURCE_CHOICE
+
+    def allocate(self, resource):
+
+        self.expect(RESOURCE_CHOICE)
+        if resource not in RESOURCE_TYPES:
+            raise ValueError(f"Unknown resource {resource!r}")
+        event = self.draw(len(EVENTS))
+        self.state = self.state.allocate(RESOURCE_TYPES.index(resource)).apply_event(
+            event, EVENTS[event].population_change)
+        self.phase = EVENT
+
+    def next_round(self):
+
+        # Same rule as Engine.next_round: a dead race or the last round ends the game
+        self.expect(EVENT)
+        if self.state.is_alive() and self.state.round < MAX_ROUNDS:
+            self.state = self.state.next_round()
+            self.phase = DICE_READY
+        else:
+            self.phase = GAME_OVER
+
+    def reset(self):
+
+        self.state = INITIAL_STATE
+        self.phase = START
+
+    def describe(self):
+
+        state = self.state
+        view = {'phase': PHASES[self.phase], 'round': state.round, 'population': state.population,
+                'food': state.food, 'defense': state.defense, 'tech': state.tech}
+        if self.phase == RESOURCE_CHOICE:
+            view['dice'] = state.dice
+        elif self.phase == EVENT:
+            event = EVENTS[state.event]
+            view['event'] = event.name
+            view['population_change'] = event.population_change
+        elif self.phase == GAME_OVER:
+            view['ending'] = state.ending()
+        return view
+
+class ServerMetrics:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.ops = Counter()
+        self.connections = 0
+        self.sessions = 0
+        self.sessions_created = 0
+        self.games = 0
+        self.endings = Counter()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)  # Seconds spent handling each recent request
+        self.histogram = [0] * (len(LATENCY_BOUNDS_US) + 1)
+        self.session_bytes = traced_bytes(lambda i: Session(i), 10_000)
+        self.reported_requests = 0
+        self.reported_at = self.started
+
+    def record(self, op, seconds, ok):
+
+        self.requests += 1
+        self.ops[op] += 1
+        if not ok:
+            self.errors += 1
+        self.latencies.append(seconds)
+        self.histogram[bisect_right(LATENCY_BOUNDS_US, seconds * 1e6)] += 1
+
+    def snapshot(self):
+
+        elapsed = time.perf_counter() - self.started
+        recent = sorted(self.latencies)
+        return {
+            'uptime_s': elapsed,
+            'requests': self.requests,
+            'errors': self.errors,
+            'requests_per_s': self.requests / elapsed if elapsed else 0.0,
+            'ops': dict(self.ops),
+            'connections': self.connections,
+            'sessions': self.sessions,
+            'sessions_created': self.sessions_created,
+            'session_bytes': self.session_bytes,
+            'games': self.games,
+            'endings': dict(self.endings),
+            'latency_us': {name: percentile(recent, fraction) * 1e6
+                           for name, fraction in (('p50', 0.50), ('p90', 0.90), ('p99', 0.99), ('max', 1.0))},
+            'latency_histogram_bounds_us': LATENCY_BOUNDS_US,
+            'latency_histogram': self.histogram,
+        }
+
+    def report(self):
+
+        # One line per interval, with the throughput since the previous line
+        now = time.perf_counter()
+        rate = (self.requests - self.reported_requests) / (now - self.reported_at)
+        self.reported_requests, self.reported_at = self.requests, now
+        latency = self.snapshot()['latency_us']
+        print(f"{self.connections} connections, {self.sessions} sessions, {rate:,.0f} req/s, "
+              f"p50 {latency['p50']:.0f}us p99 {latency['p99']:.0f}us, {self.games} games")
+
+class GameServer:
+
+    # Newline-delimited JSON over one socket: one response line per request, in order, echoing any "id"
+    def __init__(self, seed=None, max_sessions=MAX_SESSIONS):
+        self.seeds = random.Random(seed)
+        self.max_sessions = max_sessions
+        self.next_session = 0
+        self.metrics = ServerMetrics()
+        self.operations = {
+            'new': self.op_new,
+            'start': self.op_start,
+            'roll': self.op_roll,
+            'allocate': self.op_allocate,
+            'next': self.op_next,
+            'reset': self.op_reset,
+            'get': self.op_get,
+            'end': self.op_end,
+            'metrics': self.op_metrics,
+        }
+
+    async def handle_connection(self, reader, writer):
+
+        # Sessions belong to the connection that created them and end with it
+        sessions = {}
+        self.metrics.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                started = time.perf_counter()
+                op, response, ok = self.handle_line(line, sessions)
+                writer.write(response)
+                self.metrics.record(op, time.perf_counter() - started, ok)
+                if writer.transport.get_write_buffer_size() > WRITE_HIGH_WATER:
+                    await writer.drain()
+        except (ConnectionError, ValueError):
+            # ValueError is a line over the stream limit; the client is not speaking the protocol
+            pass
+        finally:
+            self.metrics.connections -= 1
+            self.metrics.sessions -= len(sessions)
+            writer.close()
+
+    def handle_line(self, line, sessions):
+
+        op = None
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Requests are JSON objects")
+            request_id = request.get('id')
+            requested = request.get('op')
+            operation = self.operations.get(requested) if isinstance(requested, str) else None
+            if operation is None:
+                raise ValueError(f"Unknown op {requested!r}")
+            op = requested
+            response = operation(request, sessions)
+            response['ok'] = True
+            ok = True
+        except (ValueError, TypeError, OverflowError, RecursionError) as e:
+            # Whatever a malformed request trips over is an error reply, never a dropped connection
+            response = {'ok': False, 'error': str(e)}
+            ok = False
+
+        if request_id is not None:
+            response['id'] = request_id
+        return op, json.dumps(response, separators=(',', ':')).encode() + b'\n', ok
+
+    def session(self, request, sessions):
+
+        key = request.get('session')
+        session = sessions.get(key) if type(key) is int else None  # JSON true is not session 1
+        if session is None:
+            raise ValueError("Unknown session")
+        return session
+
+    def op_new(self, request, sessions):
+
+        if self.metrics.sessions >= self.max_sessions:
+            raise ValueError("Session limit reached")
+        seed = request.get('seed')
+        if seed is None:
+            seed = self.seeds.getrandbits(63)
+        elif type(seed) is not int:
+            raise ValueError("Seed must be an integer")
+
+        self.next_session += 1
+        session = Session(seed)
+        sessions[self.next_session] = session
+        self.metrics.sessions += 1
+        self.metrics.sessions_created += 1
+        response = session.describe()
+        response.update(session=self.next_session, seed=seed)
+        return response
+
+    def op_start(self, request, sessions):
+
+        session = self.session(request, sessions)
+        session.start()
+        return session.describe()
+
+    def op_roll(self, request, sessions):
+
+        session = self.session(request, sessions)
+        session.roll()
+        return session.describe()
+
+    def op_allocate(self, request, sessions):
+
+        session = self.session(request, sessions)
+        session.allocate(request.get('resource'))
+        return session.describe()
+
+    def op_next(self, request, sessions):
+
+        session = self.session(request, sessions)
+        session.next_round()
+        response = session.describe()
+        if session.phase == GAME_OVER:
+            self.metrics.games += 1
+            self.metrics.endings[response['ending']] += 1
+        return response
+
+    def op_reset(self, request, sessions):
+
+        session = self.session(request, sessions)
+        session.reset()
+        return session.describe()
+
+    def op_get(self, request, sessions):
+
+        return self.session(request, sessions).describe()
+
+    def op_end(self, request, sessions):
+
+        self.session(request, sessions)
+        del sessions[request['session']]
+        self.metrics.sessions -= 1
+        return {}
+
+    def op_metrics(self, request, sessions):
+
+        return self.metrics.snapshot()
+
+    async def report_metrics(self, interval):
+
+        while True:
+            await asyncio.sleep(interval)
+            self.metrics.report()
+
+    async def serve(self, host, port, report_interval):
+
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Serving on {host}:{port}, {self.metrics.session_bytes:.0f} bytes per session")
+        if report_interval > 0:
+            asyncio.get_running_loop().create_task(self.report_metrics(report_interval))
+        async with server:
+            await server.serve_forever()
+
+class Client:
+
+    # Many sessions share one connection; responses are matched to requests by id
+    def __init__(self, reader, writer, latencies):
+        self.reader = reader
+        self.writer = writer
+        self.latencies = latencies
+        self.pending = {}
+        self.next_id = 0
+        self.receiver = asyncio.get_running_loop().create_task(self.receive())
+
+    @classmethod
+    async def connect(cls, host, port, latencies):
+
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, latencies)
+
+    async def receive(self):
+
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            self.pending.pop(response['id']).set_result(response)
+        for future in self.pending.values():
+            future.set_exception(ConnectionError("Server closed the connection"))
+
+    async def call(self, op, **fields):
+
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.next_id] = future
+        fields.update(op=op, id=self.next_id)
+        started = time.perf_counter()
+        self.writer.write(json.dumps(fields, separators=(',', ':')).encode() + b'\n')
+        response = await future
+        self.latencies.append(time.perf_counter() - started)
+        if not response['ok']:
+            raise RuntimeError(f"{op}: {response['error']}")
+        return response
+
+    async def close(self):
+
+        self.writer.close()
+        await self.receiver
+
+async def play_session(client, games, seed):
+
+    # The 'lowest' strategy from simulate.py: always the currently smallest resource
+    session = (await client.call('new', seed=seed))['session']
+    for _ in range(games):
+        view = await client.call('start', session=session)
+        while view['phase'] != 'GAME_OVER':
+            view = await client.call('roll', session=session)
+            resource = min(RESOURCE_TYPES, key=lambda name: view[name])
+            await client.call('allocate', session=session, resource=resource)
+            view = await client.call('next', session=session)
+        await client.call('reset', session=session)
+    await client.call('end', session=session)
+
+async def wait_for_server(host, port, timeout):
+
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+async def generate_load(host, port, connections, sessions, games, seed):
+
+    latencies = []
+    clients = [await Client.connect(host, port, latencies) for _ in range(connections)]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(play_session(clients[i % connections], games, seed + i) for i in range(sessions)))
+    elapsed = time.perf_counter() - started
+
+    server_metrics = await clients[0].call('metrics')
+    for client in clients:
+        await client.close()
+
+    latencies.sort()
+    print(f"{sessions} sessions over {connections} connections, {sessions * games} games, "
+          f"{len(latencies)} requests in {elapsed:.2f}s")
+    print(f"  Throughput: {len(latencies) / elapsed:,.0f} req/s, {sessions * games / elapsed:,.0f} games/s")
+    print("  Round trip: " + ", ".join(f"{name} {percentile(latencies, fraction) * 1000:.2f}ms"
+                                       for name, fraction in (('p50', 0.50), ('p90', 0.90), ('p99', 0.99),
+                                                              ('max', 1.0))))
+    server_latency = server_metrics['latency_us']
+    print(f"  Server handling: p50 {server_latency['p50']:.0f}us, p99 {server_latency['p99']:.0f}us; "
+          f"{server_metrics['session_bytes']:.0f} bytes per session, {server_metrics['errors']} errors")
+    print(f"  Endings: {dict(sorted(server_metrics['endings'].items()))}")
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Headless game server for many concurrent sessions")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help="run the server")
+    serve_parser.add_argument('--host', default=DEFAULT_HOST)
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--seed', type=int, help="seeds the sessions that do not bring their own")
+    serve_parser.add_argument('--max-sessions', type=int, default=MAX_SESSIONS)
+    serve_parser.add_argument('--report-interval', type=float, default=5.0, help="seconds; 0 disables")
+
+    load_parser = commands.add_parser('load', help="play many sessions against a server and report throughput")
+    load_parser.add_argument('--host', default=DEFAULT_HOST)
+    load_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    load_parser.add_argument('--connections', type=int, default=16)
+    load_parser.add_argument('--sessions', type=int, default=2000)
+    load_parser.add_argument('--games', type=int, default=5, help="games per session")
+    load_parser.add_argument('--seed', type=int, default=1)
+    load_parser.add_argument('--spawn', action='store_true', help="start a server process for the run")
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        server = GameServer(args.seed, args.max_sessions)
+        try:
+            asyncio.run(server.serve(args.host, args.port, args.report_interval))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    process = None
+    if args.spawn:
+        process = subprocess.Popen([sys.executable, __file__, 'serve', '--host', args.host, '--port', str(args.port),
+                                    '--report-interval', '0'])
+    try:
+        if process:
+            asyncio.run(wait_for_server(args.host, args.port, timeout=10))
+        asyncio.run(generate_load(args.host, args.port, args.connections, args.sessions, args.games, args.seed))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from rules import ENDINGS, MAX_ROUNDS, RESOURCE_TYPES, DICE_SIDES, RULES, create_random_events
+
+FOOD, DEFENSE, TECH = range(len(RESOURCE_TYPES))
+SHARD_SIZE = 1 << 16  # Games per independently seeded shard; fixed so results don't depend on the worker count
+
+# Strategies see the whole batch at once and return one resource index per game
+def all_food(round_number, population, food, defense, tech, dice, rng):
+    return np.full(len(dice), FOOD, dtype=np.int8)
+
+def all_defense(round_number, population, food, defense, tech, dice, rng):
+    return np.full(len(dice), DEFENSE, dtype=np.int8)
+
+def all_tech(round_number, population, food, defense, tech, dice, rng):
+    return np.full(len(dice), TECH, dtype=np.int8)
+
+def uniform_random(round_number, population, food, defense, tech, dice, rng):
+    return rng.integers(0, len(RESOURCE_TYPES), len(dice), dtype=np.int8)
+
+def lowest_first(round_number, population, food, defense, tech, dice, rng):
+    return np.argmin(np.stack([food, defense, tech]), axis=0).astype(np.int8)
+
+def food_then_tech(round_number, population, food, defense, tech, dice, rng):
+    # Aims for the Agricultural Age: food up to 8, then technology
+    return np.where(food < 8, FOOD, TECH).astype(np.int8)
+
+STRATEGIES = {
+    'food': all_food,
+    'defense': all_defense,
+    'tech': all_tech,
+    'random': uniform_random,
+    'lowest': lowest_first,
+    'agricultural': food_then_tech,
+}
+
+ENDING_TABLE = np.frombuffer(RULES.table, dtype=np.int8).reshape(RULES.shape)
+
+def classify_endings(population, food, defense, tech):
+
+    # Vectorized determine_ending(): one gather from the compiled rules table
+    caps = RULES.caps
+    return ENDING_TABLE[np.minimum(population, caps[0]), np.minimum(food, caps[1]),
+                        np.minimum(defense, caps[2]), np.minimum(tech, caps[3])]
+
+def simulate_chunk(games, strategy, rng, population_changes):
+
+    population = np.full(games, 5, dtype=np.int32)
+    resources = np.zeros((len(RESOURCE_TYPES), games), dtype=np.int32)
+    finished = np.zeros(games, dtype=bool)
+    event_counts = np.zeros(len(population_changes), dtype=np.int64)
+
+    for round_number in range(1, MAX_ROUNDS + 1):
+        active = ~finished
+        dice = rng.integers(1, DICE_SIDES + 1, games, dtype=np.int32)
+        choice = strategy(round_number, population, resources[FOOD], resources[DEFENSE], resources[TECH], dice, rng)
+        resources[choice, np.arange(games)] += np.where(active, dice, 0)
+
+        events = rng.integers(0, len(population_changes), games)
+        event_counts += np.bincount(events[active], minlength=len(population_changes))
+        population = np.where(active, np.maximum(population + population_changes[events], 0), population)
+
+        # A wiped-out race ends the game immediately, like Engine.next_round()
+        finished |= population == 0
+
+    endings = classify_endings(population, resources[FOOD], resources[DEFENSE], resources[TECH])
+    return np.bincount(endings, minlength=len(ENDINGS)), event_counts
+
+def simulate_shard(job):
+
+    # Runs in a worker process; strategy is a name or a module-level function so it pickles
+    games, strategy, seed_sequence = job
+    strategy_fn = STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+    population_changes = np.array([event.population_change for event in create_random_events()], dtype=np.int32)
+    return simulate_chunk(games, strategy_fn, np.random.default_rng(seed_sequence), population_changes)
+
+def simulate(games, strategy='random', seed=None, workers=1):
+
+    # Each shard gets its own child of one SeedSequence, so a seed reproduces the same totals on any worker count
+    root = np.random.SeedSequence(seed)
+    sizes = [min(SHARD_SIZE, games - start) for start in range(0, games, SHARD_SIZE)]
+    jobs = list(zip(sizes, [strategy] * len(sizes), root.spawn(len(sizes))))
+    events = create_random_events()
+
+    ending_counts = np.zeros(len(ENDINGS), dtype=np.int64)
+    event_counts = np.zeros(len(events), dtype=np.int64)
+
+    started = time.perf_counter()
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(min(workers, len(jobs))) as pool:
+            results = list(pool.map(simulate_shard, jobs))
+    else:
+        results = map(simulate_shard, jobs)
+
+    # Merged in shard order, never completion order
+    for shard_endings, shard_events in results:
+        ending_counts += shard_endings
+        event_counts += shard_events
+    elapsed = time.perf_counter() - started
+
+    return {
+        'games': games,
+        'seed': root.entropy,
+        'endings': dict(zip(ENDINGS, ending_counts.tolist())),
+        'events': dict(zip((event.name for event in events), event_counts.tolist())),
+        'seconds': elapsed,
+        'games_per_second': games / elapsed if elapsed > 0 else float('inf'),
+    }
+
+def print_report(result):
+
+    games = result['games']
+    print(f"{games} games in {result['seconds']:.3f}s ({result['games_per_second']:,.0f} games/s), seed {result['seed']}")
+    for name, count in result['endings'].items():
+        print(f"  {name:<20} {count:>12} {count / games:8.3%}")
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Monte Carlo ending distribution for an allocation strategy")
+    parser.add_argument('--games', type=int, default=1_000_000)
+    parser.add_argument('--strategy', choices=sorted(STRATEGIES), default='random')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print_report(simulate(args.games, args.strategy, args.seed, args.workers))
+
+if __name__ == "__main__":
+    main()
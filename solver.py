@@ -0,0 +1,167 @@
+import argparse
+import time
+
+import numpy as np
+
+from rules import DICE_SIDES, ENDINGS, MAX_ROUNDS, RESOURCE_TYPES, RULES, Race, create_random_events
+from simulate import classify_endings
+
+class Solution:
+
+    def __init__(self, target, rounds, caps, policy, probabilities, seconds):
+        self.target = target
+        self.rounds = rounds
+        self.caps = caps
+        self.policy = policy
+        self.probabilities = probabilities
+        self.seconds = seconds
+
+    def best_resource(self, round_number, population, food, defense, tech, dice):
+
+        table = self.policy[round_number - 1]
+        population = min(population, table.shape[1] - 1)
+        food, defense, tech = (min(value, cap) for value, cap in zip((food, defense, tech), self.caps))
+        return RESOURCE_TYPES[table[dice - 1, population, food, defense, tech]]
+
+    def save(self, path):
+
+        np.savez_compressed(path, target=self.target, rounds=self.rounds, caps=np.array(self.caps),
+                            probabilities=np.array([self.probabilities[name] for name in ENDINGS]),
+                            **{f"round_{i + 1}": table for i, table in enumerate(self.policy)})
+
+def ending_table(populations, caps):
+
+    # Ending of every clamped final state, indexed [population, food, defense, tech]
+    grid = np.meshgrid(np.arange(populations), *(np.arange(cap + 1) for cap in caps), indexing='ij')
+    return classify_endings(*grid)
+
+def take_clamped(values, axis, amount):
+
+    # values[..., min(i + amount, cap), ...] along one axis
+    size = values.shape[axis]
+    return np.take(values, np.minimum(np.arange(size) + amount, size - 1), axis=axis)
+
+def shift_clamped(values, axis, amount):
+
+    # Moves probability mass amount steps up one axis, piling everything past the cap on the last index
+    size = values.shape[axis]
+    moved = np.zeros_like(values)
+    keep = max(size - amount, 0)
+
+    dst = [slice(None)] * values.ndim
+    src = [slice(None)] * values.ndim
+    if keep:
+        dst[axis] = slice(amount, size)
+        src[axis] = slice(0, keep)
+        moved[tuple(dst)] = values[tuple(src)]
+
+    src[axis] = slice(keep, size)
+    dst[axis] = slice(size - 1, size)
+    moved[tuple(dst)] += values[tuple(src)].sum(axis=axis, keepdims=True)
+    return moved
+
+def solve(target, rounds=MAX_ROUNDS, events=None):
+
+    if target not in ENDINGS:
+        raise ValueError(f"Unknown ending {target!r}")
+
+    started = time.perf_counter()
+    events = events if events is not None else create_random_events()
+    changes = [event.population_change for event in events]
+    # Resources past the rules table's caps classify identically, so they are clamped there
+    caps = RULES.caps[1:]
+
+    start = Race()
+    max_gain = max(max(changes), 0)
+    populations = start.population + max_gain * rounds + 1
+    endings = ending_table(populations, caps)
+    target_index = ENDINGS.index(target)
+    extinct_value = 1.0 if endings[0, 0, 0, 0] == target_index else 0.0
+
+    # Backward induction over the target's probability; policy[r] is indexed [dice - 1, pop, food, defense, tech]
+    terminal = (endings == target_index).astype(np.float64)
+    terminal[0] = extinct_value
+    value = terminal
+    policy = [None] * rounds
+
+    for round_index in reversed(range(rounds)):
+        # Only populations reachable by this round are solved; the rest stay zero and are never read
+        reachable = min(populations, start.population + max_gain * round_index + 1)
+        after_allocation = np.zeros((reachable,) + value.shape[1:])
+        for change in changes:
+            after_allocation += value[np.clip(np.arange(reachable) + change, 0, populations - 1)]
+        after_allocation /= len(changes)
+
+        value = np.zeros_like(terminal)
+        table = np.zeros((DICE_SIDES,) + after_allocation.shape, dtype=np.int8)
+
+        for dice in range(1, DICE_SIDES + 1):
+            # Elementwise argmax over food, defense, tech; ties keep the earlier resource
+            food, defense, tech = (take_clamped(after_allocation, axis, dice) for axis in (1, 2, 3))
+            best = (defense > food).astype(np.int8)
+            best_value = np.maximum(food, defense)
+            best[tech > best_value] = 2
+            table[dice - 1] = best
+            value[:reachable] += np.maximum(best_value, tech)
+
+        value /= DICE_SIDES
+        value[0] = extinct_value
+        policy[round_index] = table
+
+    probabilities = ending_distribution(policy, changes, caps, endings, start)
+    return Solution(target, rounds, caps, policy, probabilities, time.perf_counter() - started)
+
+def ending_distribution(policy, changes, caps, endings, start):
+
+    # Forward pass: push the exact state distribution through the policy
+    populations = endings.shape[0]
+    totals = np.zeros(len(ENDINGS))
+    state = np.zeros(endings.shape)
+    state[start.population, min(start.food, caps[0]), min(start.defense, caps[1]), min(start.tech, caps[2])] = 1.0
+
+    for round_index, table in enumerate(policy):
+        reachable = table.shape[1]
+        current = state[:reachable]
+        allocated = np.zeros_like(state)
+        for dice in range(1, DICE_SIDES + 1):
+            choice = table[dice - 1]
+            for resource in range(len(RESOURCE_TYPES)):
+                mass = np.where(choice == resource, current, 0.0)
+                allocated[:reachable] += shift_clamped(mass, resource + 1, dice)
+        allocated /= DICE_SIDES
+
+        state = np.zeros_like(allocated)
+        for change in changes:
+            if change >= 0:
+                state[change:] += allocated[:populations - change]
+            else:
+                state[:change] += allocated[-change:]
+                state[0] += allocated[1:-change].sum(axis=0)
+        state /= len(changes)
+
+        # A wiped-out race ends the game right away
+        totals[endings[0, 0, 0, 0]] += state[0].sum()
+        state[0] = 0.0
+
+    totals += np.bincount(endings.ravel(), weights=state.ravel(), minlength=len(ENDINGS))
+    return dict(zip(ENDINGS, totals.tolist()))
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Exact ending probabilities under the policy that maximizes one ending")
+    parser.add_argument('--target', choices=ENDINGS, default='agricultural')
+    parser.add_argument('--rounds', type=int, default=MAX_ROUNDS)
+    parser.add_argument('--save', help="write the policy table to this .npz file")
+    args = parser.parse_args()
+
+    solution = solve(args.target, args.rounds)
+    print(f"Optimal policy for {args.target} over {args.rounds} rounds solved in {solution.seconds:.3f}s")
+    for name, probability in solution.probabilities.items():
+        print(f"  {name:<20} {probability:.6f}")
+
+    if args.save:
+        solution.save(args.save)
+        print(f"Policy table written to {args.save}")
+
+if __name__ == "__main__":
+    main()
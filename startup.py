@@ -0,0 +1,82 @@
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+NULL_SPAN = nullcontext()
+
+class StartupTracer:
+
+    # Times imports, subsystem init, font lookups and asset loads from process start to the first frame
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.spans = []  # (kind, label, thread name, start ms, duration ms, nesting depth)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.first_frame_ms = None
+        if enabled:
+            self.install_import_hook()
+
+    def install_import_hook(self):
+
+        original_import = builtins.__import__
+
+        def traced_import(name, globals=None, locals=None, fromlist=(), level=0):
+            # Only first-time absolute imports cost anything worth reporting
+            if level or name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+            with self.span('import', name):
+                return original_import(name, globals, locals, fromlist, level)
+
+        builtins.__import__ = traced_import
+
+    def span(self, kind, label):
+
+        if not self.enabled:
+            return NULL_SPAN
+        return self.timed(kind, label)
+
+    @contextmanager
+    def timed(self, kind, label):
+
+        depth = getattr(self.local, 'depth', 0)
+        self.local.depth = depth + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            self.local.depth = depth
+            with self.lock:
+                self.spans.append((kind, label, threading.current_thread().name,
+                                   (started - self.started) * 1000, (ended - started) * 1000, depth))
+
+    def first_frame(self):
+
+        if not self.enabled or self.first_frame_ms is not None:
+            return
+        self.first_frame_ms = (time.perf_counter() - self.started) * 1000
+        self.report()
+
+    def report(self):
+
+        with self.lock:
+            spans = sorted(self.spans, key=lambda span: span[3])
+
+        print(f"Startup trace: first frame after {self.first_frame_ms:.1f}ms")
+        totals = {}
+        for kind, label, thread, start, duration, depth in spans:
+            # Nested spans are already inside their parent's time
+            if depth == 0:
+                totals[kind] = totals.get(kind, 0.0) + duration
+            if depth <= 1 and duration >= 1.0:
+                where = "" if thread == 'MainThread' else f"  [{thread}]"
+                print(f"  {start:8.1f}ms {duration:8.1f}ms  {'  ' * depth}{kind:<7} {label}{where}")
+
+        summary = ', '.join(f"{kind} {total:.1f}ms" for kind, total in sorted(totals.items()))
+        print(f"  Totals (background threads overlap the main thread): {summary}")
+
+STARTUP = StartupTracer(os.environ.get('NVWA_TRACE_STARTUP') == '1')
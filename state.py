@@ -0,0 +1,195 @@
+import argparse
+import time
+
+from rules import MAX_EVENTS, MAX_ROUNDS, RESOURCE_TYPES, Race, create_random_events, determine_ending
+from stats import traced_bytes
+
+# Field widths of the packed layout, lowest bits first
+DICE_BITS = 3  # 0 before the roll, else 1-6
+EVENT_BITS = MAX_EVENTS.bit_length()  # 0 before the event, else event index + 1
+RESOURCE_BITS = 12
+POPULATION_BITS = 10
+ROUND_BITS = 8
+
+DICE_SHIFT = 0
+EVENT_SHIFT = DICE_SHIFT + DICE_BITS
+TECH_SHIFT = EVENT_SHIFT + EVENT_BITS
+DEFENSE_SHIFT = TECH_SHIFT + RESOURCE_BITS
+FOOD_SHIFT = DEFENSE_SHIFT + RESOURCE_BITS
+POPULATION_SHIFT = FOOD_SHIFT + RESOURCE_BITS
+ROUND_SHIFT = POPULATION_SHIFT + POPULATION_BITS
+
+DICE_MASK = (1 << DICE_BITS) - 1
+EVENT_MASK = (1 << EVENT_BITS) - 1
+RESOURCE_MASK = (1 << RESOURCE_BITS) - 1
+POPULATION_MASK = (1 << POPULATION_BITS) - 1
+ROUND_MASK = (1 << ROUND_BITS) - 1
+
+# Indexed like RESOURCE_TYPES
+RESOURCE_SHIFTS = (FOOD_SHIFT, DEFENSE_SHIFT, TECH_SHIFT)
+
+class PackedState(int):
+
+    # One int holding round, population, resources, the pending dice roll and the last event.
+    # Hashing and equality are the int's own; every transition returns a new state.
+    __slots__ = ()
+
+    @classmethod
+    def pack(cls, round_number, population, food, defense, tech, dice=0, event=None):
+
+        fields = ((round_number, ROUND_MASK), (population, POPULATION_MASK), (food, RESOURCE_MASK),
+                  (defense, RESOURCE_MASK), (tech, RESOURCE_MASK), (dice, DICE_MASK))
+        for value, mask in fields:
+            if not 0 <= value <= mask:
+                raise OverflowError(f"{value} does not fit in {mask.bit_length()} bits")
+
+        event_field = 0 if event is None else event + 1
+        if not 0 <= event_field <= EVENT_MASK:
+            raise OverflowError(f"Event index {event} does not fit in {EVENT_BITS} bits")
+
+        return cls(round_number << ROUND_SHIFT | population << POPULATION_SHIFT | food << FOOD_SHIFT
+                   | defense << DEFENSE_SHIFT | tech << TECH_SHIFT | event_field << EVENT_SHIFT | dice)
+
+    @classmethod
+    def from_race(cls, race, dice=0, event=None):
+
+        return cls.pack(race.round, race.population, race.food, race.defense, race.tech, dice, event)
+
+    @classmethod
+    def initial(cls):
+
+        return cls.from_race(Race())
+
+    @property
+    def round(self):
+        return self >> ROUND_SHIFT & ROUND_MASK
+
+    @property
+    def population(self):
+        return self >> POPULATION_SHIFT & POPULATION_MASK
+
+    @property
+    def food(self):
+        return self >> FOOD_SHIFT & RESOURCE_MASK
+
+    @property
+    def defense(self):
+        return self >> DEFENSE_SHIFT & RESOURCE_MASK
+
+    @property
+    def tech(self):
+        return self >> TECH_SHIFT & RESOURCE_MASK
+
+    @property
+    def dice(self):
+        return self & DICE_MASK
+
+    @property
+    def event(self):
+        event_field = self >> EVENT_SHIFT & EVENT_MASK
+        return event_field - 1 if event_field else None
+
+    def is_alive(self):
+        return self >> POPULATION_SHIFT & POPULATION_MASK > 0
+
+    def roll(self, dice):
+
+        return PackedState(self & ~DICE_MASK | dice)
+
+    def allocate(self, resource, points=None):
+
+        # resource is an index into RESOURCE_TYPES; points defaults to the pending dice roll, which is consumed
+        shift = RESOURCE_SHIFTS[resource]
+        if points is None:
+            points = self & DICE_MASK
+        if (self >> shift & RESOURCE_MASK) + points > RESOURCE_MASK:
+            raise OverflowError(f"{RESOURCE_TYPES[resource]} exceeds {RESOURCE_MASK}")
+        return PackedState((self & ~DICE_MASK) + (points << shift))
+
+    def apply_event(self, event, population_change):
+
+        population = max((self >> POPULATION_SHIFT & POPULATION_MASK) + population_change, 0)
+        if population > POPULATION_MASK:
+            raise OverflowError(f"Population exceeds {POPULATION_MASK}")
+        cleared = self & ~(POPULATION_MASK << POPULATION_SHIFT | EVENT_MASK << EVENT_SHIFT)
+        return PackedState(cleared | population << POPULATION_SHIFT | (event + 1) << EVENT_SHIFT)
+
+    def next_round(self):
+
+        return PackedState((self & ~(EVENT_MASK << EVENT_SHIFT)) + (1 << ROUND_SHIFT))
+
+    def to_race(self):
+
+        race = Race()
+        race.round, race.population = self.round, self.population
+        race.food, race.defense, race.tech = self.food, self.defense, self.tech
+        return race
+
+    def ending(self):
+
+        return determine_ending(self.to_race())
+
+    def __repr__(self):
+        return (f"PackedState(round={self.round}, population={self.population}, food={self.food}, "
+                f"defense={self.defense}, tech={self.tech}, dice={self.dice}, event={self.event})")
+
+class DictRace:
+
+    # Race as it was before __slots__, kept only as the baseline for the memory report
+    def __init__(self):
+        self.population = 5
+        self.food = 0
+        self.defense = 0
+        self.tech = 0
+        self.round = 1
+
+def memory_report(count=100_000):
+
+    def dict_race(i):
+        race = DictRace()
+        race.tech = i
+        return race
+
+    def slotted_race(i):
+        race = Race()
+        race.tech = i
+        return race
+
+    return {
+        'Race with __dict__': traced_bytes(dict_race, count),
+        'Race with __slots__': traced_bytes(slotted_race, count),
+        'tuple of 7 ints': traced_bytes(lambda i: (1, 5, 0, 0, i, 0, 0), count),
+        'PackedState': traced_bytes(lambda i: PackedState.pack(1, 5, 0, 0, i & RESOURCE_MASK), count),
+    }
+
+def transitions_per_second(count=200_000):
+
+    # Plays whole games: roll, allocate and event each round, counting every transition
+    changes = [event.population_change for event in create_random_events()]
+    initial = PackedState.initial()
+    state = initial
+    transitions = 0
+    started = time.perf_counter()
+    for i in range(count):
+        state = state.roll(i % 6 + 1).allocate(i % 3).apply_event(i % 5, changes[i % 5])
+        transitions += 3
+        if state.round >= MAX_ROUNDS or not state.is_alive():
+            state = initial
+        else:
+            state = state.next_round()
+            transitions += 1
+    return transitions / (time.perf_counter() - started)
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Memory and speed of the packed game state")
+    parser.add_argument('--count', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"Bytes per state over {args.count} live states:")
+    for name, size in memory_report(args.count).items():
+        print(f"  {name:<22} {size:8.1f}")
+    print(f"PackedState transitions: {transitions_per_second():,.0f}/s")
+
+if __name__ == "__main__":
+    main()
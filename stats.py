@@ -0,0 +1,20 @@
+import sys
+import tracemalloc
+
+def percentile(sorted_values, fraction):
+
+    # Nearest-rank on an already sorted list
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+def traced_bytes(build, count):
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [build(i) for i in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    # The list's own pointer array is not part of the per-state cost
+    return (used - sys.getsizeof(items)) / count
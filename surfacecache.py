@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+
+class SurfaceCache:
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def surface_bytes(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def lookup(self, key):
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get(self, key, build):
+
+        value = self.lookup(key)
+        if value is None:
+            value = build()
+            self.put(key, value)
+        return value
+
+    def put(self, key, value, size=None):
+
+        if size is None:
+            size = self.surface_bytes(value)
+
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.used_bytes -= old[1]
+
+            self.entries[key] = (value, size)
+            self.used_bytes += size
+
+            # Evict least recently used entries, but always keep the newest one
+            while self.used_bytes > self.max_bytes and len(self.entries) > 1:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.used_bytes -= evicted_size
+
+    def clear(self):
+
+        with self.lock:
+            self.entries.clear()
+            self.used_bytes = 0
@@ -0,0 +1,142 @@
+import pytest
+
+from autosave import SAVED_STATES, Autosaver, Snapshot
+from replay import Replay, ReplayMismatch, check, decode_moves, encode_moves, resimulate, verify
+from rules import DICE_SIDES, MAX_EVENTS, RESOURCE_TYPES, Engine, create_random_events
+from state import PackedState
+
+def strategy(race, points):
+
+    return RESOURCE_TYPES[(race.round + points) % len(RESOURCE_TYPES)]
+
+def played(seed):
+
+    engine = Engine(seed=seed)
+    engine.play(strategy)
+    return engine
+
+def play_rounds(engine, rounds):
+
+    # The engine's steps as the game drives them, stopping after a number of rounds
+    for _ in range(rounds):
+        points = engine.roll_dice()
+        engine.allocate_resource(strategy(engine.race, points), points)
+        engine.trigger_random_event()
+        if engine.next_round():
+            return True
+    return False
+
+def test_moves_round_trip():
+
+    moves = [(dice, choice, event) for dice in range(1, DICE_SIDES + 1) for choice in range(len(RESOURCE_TYPES))
+             for event in range(MAX_EVENTS)]
+    assert decode_moves(encode_moves(moves)) == moves
+
+    with pytest.raises(ValueError):
+        encode_moves([(1, 0, MAX_EVENTS)])
+    with pytest.raises(ValueError):
+        encode_moves([(0, 0, 0)])
+
+@pytest.mark.parametrize('byte', [6, 7, 3 << 3])
+def test_invalid_move_bytes_are_rejected(byte):
+
+    # Dice values 7 and 8 and resource index 3 fit in the byte but are not moves
+    with pytest.raises(ValueError):
+        decode_moves(bytes([byte]))
+
+def test_replay_round_trip(tmp_path):
+
+    for seed in range(50):
+        replay = Replay.from_engine(played(seed))
+        decoded = Replay.decode(replay.encode())
+        assert (decoded.moves, decoded.ending, decoded.seed, decoded.rules_digest) == (
+            replay.moves, replay.ending, replay.seed, replay.rules_digest)
+        assert verify(decoded) == []
+
+    unseeded = Replay(replay.moves, replay.ending)
+    assert Replay.decode(unseeded.encode()).seed is None
+
+    loaded = Replay.load(replay.save(str(tmp_path)))
+    assert (loaded.moves, loaded.ending, loaded.seed) == (replay.moves, replay.ending, replay.seed)
+
+def test_damaged_replays_are_rejected():
+
+    data = Replay.from_engine(played(1)).encode()
+    for damaged in (data[:-1], data + b'\0', data[:10], b'XXXX' + data[4:]):
+        with pytest.raises(ValueError):
+            Replay.decode(damaged)
+    with pytest.raises(ValueError):
+        Replay([], 'x' * 256).encode()
+
+def test_replays_that_no_longer_fit_the_rules():
+
+    events = create_random_events()
+    replay = Replay.from_engine(played(3))
+    last_event = max(event for dice, choice, event in replay.moves)
+    with pytest.raises(ReplayMismatch, match="no longer exists"):
+        resimulate(replay, events=events[:last_event])
+
+    # A game that outlasts its recorded rounds, as under rules where fewer races die out early
+    with pytest.raises(ReplayMismatch, match="fewer rounds"):
+        resimulate(Replay(replay.moves[:-1], replay.ending))
+
+def test_check_reports_every_bad_file(tmp_path, capsys):
+
+    good = Replay.from_engine(played(4))
+    good_path = good.save(str(tmp_path))
+    (tmp_path / 'truncated.nvr').write_bytes(good.encode()[:-1])
+    (tmp_path / 'invalid.nvr').write_bytes(good.encode()[:-1] + bytes([7]))
+    short = Replay(good.moves[:1], good.ending)
+    (tmp_path / 'short.nvr').write_bytes(short.encode())
+
+    assert check([str(tmp_path)]) is False
+    assert "4 replays checked" in capsys.readouterr().out.splitlines()[-1]
+    assert check([str(tmp_path / 'invalid.nvr')]) is False
+    assert check([good_path]) is True
+
+@pytest.mark.parametrize('state', SAVED_STATES)
+def test_snapshot_round_trip(state):
+
+    engine = Engine(seed=7)
+    play_rounds(engine, 2)
+    event = 4 if state == "EVENT" else None
+    snapshot = Snapshot(state, PackedState.from_race(engine.race, 5, event), engine.moves, engine.seed)
+    decoded = Snapshot.decode(snapshot.encode())
+    assert (decoded.state, decoded.race_state, decoded.moves, decoded.seed, decoded.rules_digest) == (
+        snapshot.state, snapshot.race_state, snapshot.moves, snapshot.seed, snapshot.rules_digest)
+    assert decoded.race_state.event == event
+
+    with pytest.raises(ValueError):
+        Snapshot.decode(snapshot.encode()[:-len(engine.moves) - 1])
+
+def test_resumed_snapshot_finishes_like_the_original_game():
+
+    for seed in range(50):
+        original = played(seed)
+        for rounds in range(1, len(original.moves)):
+            # play() resets once more than the constructor, drawing the same second seed
+            engine = Engine(seed=seed)
+            engine.reset()
+            play_rounds(engine, rounds)
+            data = Snapshot("DICE_READY", PackedState.from_race(engine.race), engine.moves, engine.seed).encode()
+
+            snapshot = Snapshot.decode(data)
+            resumed = Engine()
+            resumed.resume(snapshot.race_state.to_race(), snapshot.moves, snapshot.seed)
+            play_rounds(resumed, len(original.moves))
+            assert (resumed.moves, resumed.ending) == (original.moves, original.ending)
+
+def test_autosaver_writes_and_clears(tmp_path):
+
+    path = tmp_path / 'autosave.nvs'
+    autosaver = Autosaver(str(path))
+    autosaver.save(b'first')
+    autosaver.save(b'second')
+    autosaver.close()
+    assert path.read_bytes() == b'second'
+    assert not list(tmp_path.glob('*.tmp'))
+
+    autosaver = Autosaver(str(path))
+    autosaver.clear()
+    autosaver.close()
+    assert not path.exists()
@@ -0,0 +1,97 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from rules import CONDITION_FIELDS, ENDINGS, MAX_EVENTS, Engine, Race, RuleSet, accepts, determine_ending
+from simulate import classify_endings
+from solver import solve
+
+def if_chain_ending(population, food, defense, tech):
+
+    # determine_ending() as it was written before the rules moved into rules.json
+    if population == 0:
+        return 'extinction'
+    if 0 < population <= 7:
+        return 'primitive'
+    if 7 < population <= 10:
+        if food >= 8 and tech >= 5:
+            return 'agricultural'
+        if food >= 10 and 3 <= defense < 5 and tech >= 8:
+            return 'scientific'
+        if food >= 10 and tech >= 10:
+            return 'utopia'
+        return 'prosperous'
+    if food >= 8 and defense >= 25 and tech >= 10:
+        return 'ai_crisis'
+    return 'population_overload'
+
+def first_match(data, values):
+
+    for rule in data['endings']:
+        if all(accepts(rule, field, value) for field, value in zip(CONDITION_FIELDS, values)):
+            return rule['name']
+    return data['default_ending']
+
+def race(population, food, defense, tech):
+
+    race = Race()
+    race.population, race.food, race.defense, race.tech = population, food, defense, tech
+    return race
+
+def test_shipped_rules_match_if_chain():
+
+    # Past every threshold the old code checked: population 10, food and tech 10, defense 25
+    for values in product(range(16), range(16), range(32), range(16)):
+        assert determine_ending(race(*values)) == if_chain_ending(*values), values
+
+def test_compiled_table_is_first_match():
+
+    data = {
+        'events': [],
+        'endings': [
+            {'name': 'low', 'population': [None, 2]},
+            {'name': 'rich', 'food': [5, None], 'tech': [3, 6]},
+            {'name': 'guarded', 'defense': [4, 4]},
+            {'name': 'rich', 'defense': [9, None]},
+        ],
+        'default_ending': 'plain',
+    }
+    rules = RuleSet(data)
+    assert rules.endings == ('low', 'rich', 'guarded', 'plain')
+    for values in product(range(12), repeat=4):
+        assert rules.determine_ending(race(*values)) == first_match(data, values), values
+
+def test_rules_reject_unknown_conditions_and_too_many_events():
+
+    with pytest.raises(ValueError):
+        RuleSet({'events': [], 'endings': [{'name': 'x', 'gold': [1, None]}], 'default_ending': 'x'})
+
+    event = {'name': 'Rain', 'animation': 'flood', 'population_change': 1}
+    with pytest.raises(ValueError):
+        RuleSet({'events': [event] * (MAX_EVENTS + 1), 'endings': [], 'default_ending': 'x'})
+
+def test_classify_endings_matches_determine_ending():
+
+    grid = np.meshgrid(*(np.arange(30) for _ in CONDITION_FIELDS), indexing='ij')
+    endings = classify_endings(*grid)
+    for values in product(range(0, 30, 3), repeat=4):
+        assert ENDINGS[endings[values]] == determine_ending(race(*values)), values
+
+def test_solver_distribution_matches_engine():
+
+    # The exact distribution under the solved policy, against that policy played by the real engine
+    solution = solve('agricultural')
+    assert sum(solution.probabilities.values()) == pytest.approx(1.0)
+
+    def strategy(race, points):
+
+        return solution.best_resource(race.round, race.population, race.food, race.defense, race.tech, points)
+
+    engine = Engine(seed=1)
+    games = 20_000
+    counts = dict.fromkeys(ENDINGS, 0)
+    for _ in range(games):
+        counts[engine.play(strategy)] += 1
+    for name in ENDINGS:
+        assert counts[name] / games == pytest.approx(solution.probabilities[name], abs=0.01), name
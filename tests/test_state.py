@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from rules import MAX_ROUNDS, RESOURCE_TYPES, Engine, create_random_events
+from state import POPULATION_MASK, RESOURCE_MASK, PackedState
+
+def test_pack_round_trip():
+
+    state = PackedState.pack(3, 9, 14, 27, 11, dice=4, event=6)
+    assert (state.round, state.population, state.food, state.defense, state.tech) == (3, 9, 14, 27, 11)
+    assert (state.dice, state.event) == (4, 6)
+    assert PackedState.from_race(state.to_race()) == PackedState.pack(3, 9, 14, 27, 11)
+    assert PackedState.initial().event is None
+
+def test_fields_never_overflow_into_neighbours():
+
+    with pytest.raises(OverflowError):
+        PackedState.pack(1, POPULATION_MASK + 1, 0, 0, 0)
+    with pytest.raises(OverflowError):
+        PackedState.pack(1, 5, RESOURCE_MASK, 0, 0).roll(1).allocate(0)
+    with pytest.raises(OverflowError):
+        PackedState.pack(1, POPULATION_MASK, 0, 0, 0).apply_event(0, 1)
+
+def test_transitions_match_engine():
+
+    # Every seeded game's recorded moves, replayed through PackedState, end in the engine's state and ending
+    changes = [event.population_change for event in create_random_events()]
+    choices = random.Random(0)
+    engine = Engine(seed=0)
+    for _ in range(2000):
+        ending = engine.play(lambda race, points: choices.choice(RESOURCE_TYPES))
+        state = PackedState.initial()
+        for round_number, (dice, choice, event) in enumerate(engine.moves, 1):
+            state = state.roll(dice)
+            assert state.dice == dice
+            state = state.allocate(choice).apply_event(event, changes[event])
+            assert (state.dice, state.event) == (0, event)
+            if round_number < len(engine.moves):
+                state = state.next_round()
+
+        race = engine.race
+        assert (state.population, state.food, state.defense, state.tech) == (race.population, race.food,
+                                                                              race.defense, race.tech)
+        assert state.round == len(engine.moves) <= MAX_ROUNDS
+        assert state.ending() == ending
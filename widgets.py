@@ -0,0 +1,228 @@
+import pygame
+
+HIT_CELL_SIZE = 64  # Pixels per side of a hit-test grid cell
+
+class Widget:
+
+    # Owns its rect and children; draw() paints it and then its children, and leaves it clean.
+    # dirty marks a widget whose look changed since it was last drawn.
+    hoverable = False  # Whether hovering changes how it looks
+
+    def __init__(self, rect, children=()):
+        self.rect = pygame.Rect(rect)
+        self.children = list(children)
+        self.on_click = None
+        self.hover = False
+        self.dirty = True
+
+    def walk(self):
+
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def draw(self, target):
+
+        self.paint(target)
+        for child in self.children:
+            child.draw(target)
+        self.dirty = False
+
+    def paint(self, target):
+        pass
+
+    def redraw(self, target):
+
+        # Repaints it alone over what it drew last time, if it can do that without the scene under it
+        return False
+
+    def set_hover(self, hover):
+
+        if hover != self.hover:
+            self.hover = hover
+            if self.hoverable:
+                self.dirty = True
+
+class Panel(Widget):
+
+    # skin() gives the skin image scaled to the rect; without one it is a bordered rounded rectangle
+    def __init__(self, rect, skin=None, fill_color=(240, 230, 200), radius=10, children=()):
+        super().__init__(rect, children)
+        self.skin = skin
+        self.fill_color = fill_color
+        self.radius = radius
+
+    def paint(self, target):
+
+        skin = self.skin() if self.skin else None
+        if skin:
+            target.blit(skin, self.rect.topleft)
+        else:
+            pygame.draw.rect(target, self.fill_color, self.rect, border_radius=self.radius)
+            pygame.draw.rect(target, (101, 67, 33), self.rect, 3, border_radius=self.radius)
+
+class Label(Widget):
+
+    # One line of text; render(font, text, color) runs again only when the text, font or color changes.
+    # The rect takes the rendered size and its parent decides where it goes.
+    def __init__(self, render, font, text="", color=(0, 0, 0)):
+        super().__init__((0, 0, 0, 0))
+        self.render = render
+        self.font = font
+        self.text = None
+        self.color = color
+        self.surface = None
+        if text:
+            self.set_text(text)
+
+    def set_text(self, text, font=None, color=None):
+
+        font = font or self.font
+        color = color or self.color
+        if (text, font, color) == (self.text, self.font, self.color):
+            return
+        self.text, self.font, self.color = text, font, color
+        self.surface = self.render(font, text, color)
+        self.rect.size = self.surface.get_size()
+        self.dirty = True
+
+    def paint(self, target):
+
+        if self.surface:
+            target.blit(self.surface, self.rect.topleft)
+
+class Column(Widget):
+
+    # Stacks its children top to bottom, centred vertically in its rect and indented from the left
+    def __init__(self, rect, children, spacing, indent):
+        super().__init__(rect, children)
+        self.spacing = spacing
+        self.indent = indent
+
+    def layout(self):
+
+        total_height = sum(child.rect.height for child in self.children) + self.spacing * (len(self.children) - 1)
+        x = self.rect.x + self.indent
+        y = self.rect.y + (self.rect.height - total_height) // 2
+        for child in self.children:
+            child.rect.topleft = (x, y)
+            y += child.rect.height + self.spacing
+
+    def draw(self, target):
+
+        if any(child.dirty for child in self.children):
+            self.layout()
+        super().draw(target)
+
+class Button(Widget):
+
+    # painter(target, rect, hover) draws the button. With a backdrop() that is the static scene under the
+    # button, both looks are rendered once on a copy of it, so drawing or re-hovering is a single blit.
+    # A button without a painter is just a click area over something drawn elsewhere.
+    def __init__(self, rect, on_click, painter=None, backdrop=None, hoverable=True):
+        super().__init__(rect)
+        self.on_click = on_click
+        self.painter = painter
+        self.backdrop = backdrop
+        self.hoverable = hoverable and painter is not None
+        self.renders = {}
+        self.rendered_over = None
+        self.dirty = painter is not None
+
+    def cached_render(self):
+
+        backdrop = self.backdrop() if self.backdrop else None
+        if backdrop is None or not backdrop.get_rect().contains(self.rect):
+            return None
+
+        # A new backdrop (another ending, say) makes the old renders stale
+        if backdrop is not self.rendered_over:
+            self.renders.clear()
+            self.rendered_over = backdrop
+
+        render = self.renders.get(self.hover)
+        if render is None:
+            render = backdrop.subsurface(self.rect).copy()
+            self.painter(render, render.get_rect(), self.hover)
+            self.renders[self.hover] = render
+        return render
+
+    def paint(self, target):
+
+        if self.painter is None:
+            return
+        render = self.cached_render()
+        if render is not None:
+            target.blit(render, self.rect.topleft)
+        else:
+            self.painter(target, self.rect, self.hover)
+
+    def redraw(self, target):
+
+        render = self.cached_render() if self.painter else None
+        if render is None:
+            return False
+        target.blit(render, self.rect.topleft)
+        return True
+
+class HitGrid:
+
+    # Uniform grid over the screen; each cell lists the clickable widgets overlapping it, topmost first
+    def __init__(self, widgets, cell_size=HIT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        for widget in reversed(widgets):
+            rect = widget.rect
+            for cell_x in range(rect.left // cell_size, (rect.right - 1) // cell_size + 1):
+                for cell_y in range(rect.top // cell_size, (rect.bottom - 1) // cell_size + 1):
+                    self.cells.setdefault((cell_x, cell_y), []).append(widget)
+
+    def hit(self, pos):
+
+        for widget in self.cells.get((pos[0] // self.cell_size, pos[1] // self.cell_size), ()):
+            if widget.rect.collidepoint(pos):
+                return widget
+        return None
+
+class WidgetTree:
+
+    # The widgets of one screen, in drawing order; a single hit-test index serves clicks and hover
+    def __init__(self, roots=()):
+        self.roots = list(roots)
+        self.widgets = [widget for root in self.roots for widget in root.walk()]
+        self.grid = HitGrid([widget for widget in self.widgets if widget.on_click])
+        self.hovered = None
+
+    def draw(self, target):
+
+        for root in self.roots:
+            root.draw(target)
+
+    def hit_test(self, pos):
+        return self.grid.hit(pos)
+
+    def update_hover(self, pos):
+
+        widget = self.hit_test(pos)
+        if widget is not self.hovered:
+            if self.hovered:
+                self.hovered.set_hover(False)
+            if widget:
+                widget.set_hover(True)
+            self.hovered = widget
+
+    def click(self, pos):
+
+        widget = self.hit_test(pos)
+        if widget is None:
+            return False
+        widget.on_click()
+        return True
+
+    def take_dirty(self):
+
+        # Hands over the widgets that need redrawing and marks them clean
+        dirty = [widget for widget in self.widgets if widget.dirty]
+        for widget in dirty:
+            widget.dirty = False
+        return dirty